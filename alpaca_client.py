@@ -0,0 +1,149 @@
+# alpaca_client.py
+# Shared Alpaca REST wrapper for app.py: one pooled HTTP session per process,
+# short per-endpoint TTL caches so Streamlit reruns (and several people on the
+# dashboard at once) don't each hit the API, and a token-bucket limiter with
+# exponential backoff on HTTP 429.
+
+import threading
+import time
+
+from alpaca_trade_api.rest import REST, APIError
+from requests.adapters import HTTPAdapter
+
+# Alpaca allows 200 requests/minute per account; stay a little under it.
+RATE_PER_MINUTE = 180
+POOL_SIZE = 20
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+
+# Seconds each endpoint's response is reused for.
+TTLS = {
+    "account": 5,
+    "positions": 5,
+    "latest_trade": 2,
+    # Activities only change on fills; they are invalidated explicitly when
+    # an order is sent or the positions change, so this is just a backstop.
+    "activities": 300,
+}
+
+
+# --- Rate Limiting ---
+class TokenBucket:
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# --- Caching ---
+class TTLCache:
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def get_or_load(self, key, ttl, loader):
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        # One loader per key; concurrent reruns wait for it instead of all
+        # calling the API at once.
+        with key_lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            value = loader()
+            self.entries[key] = (time.monotonic() + ttl, value)
+            return value
+
+    def invalidate(self, *prefixes):
+        with self.lock:
+            for key in list(self.entries):
+                if key[0] in prefixes:
+                    del self.entries[key]
+
+
+# --- Client ---
+class AlpacaClient:
+    def __init__(self, key_id, secret_key, base_url, rate_per_minute=RATE_PER_MINUTE,
+                 pool_size=POOL_SIZE, max_retries=MAX_RETRIES):
+        self.rest = REST(key_id, secret_key, base_url)
+        # REST keeps a requests.Session; widen its pool for concurrent reruns.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.rest._session.mount("https://", adapter)
+        self.rest._session.mount("http://", adapter)
+        self.bucket = TokenBucket(rate_per_minute)
+        self.cache = TTLCache()
+        self.max_retries = max_retries
+        self._positions_fingerprint = None
+
+    def _call(self, fn, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except APIError as e:
+                if e.status_code != 429 or attempt == self.max_retries:
+                    raise
+                time.sleep(BACKOFF_SECONDS * 2 ** attempt)
+
+    def _cached(self, key, fn, *args, **kwargs):
+        return self.cache.get_or_load(key, TTLS[key[0]], lambda: self._call(fn, *args, **kwargs))
+
+    def invalidate(self, *names):
+        self.cache.invalidate(*names)
+
+    # --- Read endpoints ---
+    def get_account(self):
+        return self._cached(("account",), self.rest.get_account)
+
+    def get_latest_trade(self, symbol):
+        return self._cached(("latest_trade", symbol), self.rest.get_latest_trade, symbol)
+
+    def list_positions(self):
+        positions = self._cached(("positions",), self.rest.list_positions)
+        fingerprint = tuple(sorted((p.symbol, p.qty) for p in positions))
+        if fingerprint != self._positions_fingerprint:
+            # Positions moved, so there are fills we haven't seen yet.
+            self._positions_fingerprint = fingerprint
+            self.invalidate("activities")
+        return positions
+
+    def get_activities(self, activity_types=None, **kwargs):
+        key = ("activities", activity_types, tuple(sorted(kwargs.items())))
+        return self._cached(key, self.rest.get_activities, activity_types=activity_types, **kwargs)
+
+    def get_activities_uncached(self, activity_types=None, **kwargs):
+        # Incremental syncs ask only for what is newer than they hold, so a
+        # cached page would just hide fills.
+        return self._call(self.rest.get_activities, activity_types=activity_types, **kwargs)
+
+    def activities_due(self, name):
+        # True once per activities invalidation (an order sent, positions
+        # moved) or TTL expiry, so an incremental fills sync under `name`
+        # can skip the reruns in between.
+        due = []
+        self.cache.get_or_load(("activities", "due", name), TTLS["activities"], lambda: due.append(True))
+        return bool(due)
+
+    # --- Write endpoints ---
+    def submit_order(self, **kwargs):
+        order = self._call(self.rest.submit_order, **kwargs)
+        self.invalidate("account", "positions", "activities")
+        return order
@@ -1,8 +1,10 @@
 import os
 import json
+import html
 import streamlit as st
 from dotenv import load_dotenv
-from alpaca_trade_api.rest import REST
+from fills_ledger import FillsLedger
+from log_sink import LEVELS, tail as tail_log
 from datetime import datetime
 import pandas as pd
 
@@ -12,8 +14,20 @@ API_KEY = st.secrets["APCA_API_KEY_ID"]
 API_SECRET = st.secrets["APCA_API_SECRET_KEY"]
 BASE_URL = st.secrets["APCA_API_BASE_URL"]
 
-# Initialize API
-api = REST(API_KEY, API_SECRET, BASE_URL)
+# Initialize API once per server process; the client and its caches are
+# shared by every rerun and every browser session.
+@st.cache_resource
+def get_api(key_id, secret_key, base_url):
+    from alpaca_client import AlpacaClient
+    return AlpacaClient(key_id, secret_key, base_url)
+
+def api():
+    # Looked up where used, so only the code paths that talk to Alpaca build it.
+    return get_api(API_KEY, API_SECRET, BASE_URL)
+
+@st.cache_resource
+def get_ledger():
+    return FillsLedger("fills.db")
 
 
 # Set Streamlit UI layout
@@ -47,7 +61,7 @@ tabs = st.sidebar.radio("Navigation", ["📊 Trading Panel", "📉 Performance",
 # --- Account Info ---
 st.sidebar.subheader("Account Info")
 try:
-    account = api.get_account()
+    account = api().get_account()
     st.sidebar.success("✅ API Connected")
     st.sidebar.write("**Status:**", account.status)
     st.sidebar.write("**Equity:** ${:,.2f}".format(float(account.equity)))
@@ -72,7 +86,7 @@ if tabs == "📊 Trading Panel":
 
     # Live price
     try:
-        latest_quote = api.get_latest_trade(symbol)
+        latest_quote = api().get_latest_trade(symbol)
         current_price = float(latest_quote.price)
         st.markdown(f"### 💵 Current Price: **${current_price:.2f}**")
     except Exception as e:
@@ -85,7 +99,7 @@ if tabs == "📊 Trading Panel":
     with col1:
         if st.button(f"Buy 1 {symbol} @ Market"):
             try:
-                api.submit_order(symbol=symbol, qty=1, side="buy", type="market", time_in_force="gtc")
+                api().submit_order(symbol=symbol, qty=1, side="buy", type="market", time_in_force="gtc")
                 st.success("✅ Buy market order sent.")
             except Exception as e:
                 st.error(f"Buy error: {e}")
@@ -93,7 +107,7 @@ if tabs == "📊 Trading Panel":
     with col2:
         if st.button(f"Sell 1 {symbol} @ Market"):
             try:
-                api.submit_order(symbol=symbol, qty=1, side="sell", type="market", time_in_force="gtc")
+                api().submit_order(symbol=symbol, qty=1, side="sell", type="market", time_in_force="gtc")
                 st.success("✅ Sell market order sent.")
             except Exception as e:
                 st.error(f"Sell error: {e}")
@@ -105,7 +119,7 @@ if tabs == "📊 Trading Panel":
         qty = st.number_input("Quantity", min_value=1, step=1)
         if st.button("Submit Limit Order"):
             try:
-                api.submit_order(
+                api().submit_order(
                     symbol=symbol,
                     qty=qty,
                     side=side,
@@ -120,7 +134,7 @@ if tabs == "📊 Trading Panel":
     # Open Positions
     st.subheader("📂 Open Positions")
     try:
-        positions = api.list_positions()
+        positions = api().list_positions()
         if positions:
             data = []
             for p in positions:
@@ -140,31 +154,33 @@ if tabs == "📊 Trading Panel":
 elif tabs == "📉 Performance":
     st.header("📊 Performance Tracker")
     try:
-        activities = api.get_activities()
-        trade_data = [a for a in activities if a.activity_type == 'FILL' and hasattr(a, 'price')]
-        if trade_data:
-            df_perf = pd.DataFrame([{
-                "Symbol": getattr(t, 'symbol', 'N/A'),
-                "Side": t.side,
-                "Qty": float(t.qty),
-                "Price": float(t.price),
-                "Time": t.transaction_time
-            } for t in trade_data])
-            df_perf = df_perf.sort_values("Time")
-            trades_grouped = df_perf.groupby("Symbol")
-            results = []
-            for symbol, group in trades_grouped:
-                buys = group[group["Side"] == "buy"]
-                sells = group[group["Side"] == "sell"]
-                profit = sells["Price"].sum() - buys["Price"].sum()
-                results.append({"Symbol": symbol, "Total P/L": round(profit, 2)})
+        # Only fills newer than the last stored one are fetched, and only when
+        # the client has seen an order or a position change since the last
+        # sync (or its activities TTL ran out); the tables below are read from
+        # the local ledger.
+        ledger = get_ledger()
+        client = api()
+        client.list_positions()
+        if client.activities_due("fills_ledger"):
+            try:
+                ledger.sync(client)
+            except Exception:
+                client.invalidate("activities")  # retry on the next rerun
+                raise
+        results = ledger.realized_pnl()
+        if results:
             st.dataframe(pd.DataFrame(results))
+            st.subheader("🧾 Recent Fills")
+            st.dataframe(pd.DataFrame(ledger.recent_fills()))
         else:
             st.info("No trade history available.")
     except Exception as e:
         st.warning(f"Performance error: {e}")
 
 elif tabs == "⚙️ Strategy Settings":
+    # The strategy registry pulls in pandas/bar_store; only this tab needs it.
+    from strategies import STRATEGIES
+
     st.header("⚙️ Strategy Settings")
     settings_path = "settings.json"
 
@@ -174,7 +190,9 @@ elif tabs == "⚙️ Strategy Settings":
     else:
         settings = {}
 
-    strategy = st.selectbox("Select Strategy", ["ma_rsi_combo", "bollinger_rsi", "pairs_zscore"], index=0)
+    names = list(STRATEGIES)
+    saved = settings.get("strategy")
+    strategy = st.selectbox("Select Strategy", names, index=names.index(saved) if saved in names else 0)
 
     if strategy == "ma_rsi_combo":
         st.subheader("MA + RSI Settings")
@@ -219,19 +237,71 @@ elif tabs == "⚙️ Strategy Settings":
             "exit_zscore": exit_z
         }
 
-    settings["strategy"] = strategy
+    # Strategies listed here run side by side and share indicator computation.
+    # The one picked above is always among them, and "strategies" is only
+    # written for more than one, since it takes precedence over "strategy".
+    running = settings.get("strategies") or [strategy]
+    active = st.multiselect("Active Strategies", names, running + [strategy] * (strategy not in running))
+    settings["strategy"] = strategy if strategy in active or not active else active[0]
+    if len(active) > 1:
+        settings["strategies"] = active
+    else:
+        settings.pop("strategies", None)
 
     if st.button("💾 Save Strategy Settings"):
         with open(settings_path, "w") as f:
             json.dump(settings, f, indent=4)
         st.success("Settings saved.")
 
+# --- Cycle Latency ---
+# Per-stage p50/p95/p99 across bot cycles and the breakdown of the latest
+# ones, from the metrics.json the bot writes after each cycle.
+metrics_path = os.path.join(os.getcwd(), "metrics.json")
+if os.path.exists(metrics_path):
+    st.subheader("⏱️ Cycle Latency")
+    try:
+        with open(metrics_path, "r") as f:
+            metrics = json.load(f)
+        summary = pd.DataFrame(metrics["summary"]).T
+        latency = (summary[["mean", "p50", "p95", "p99"]].astype(float) * 1000).round(1)
+        latency.insert(0, "count", summary["count"].astype(int))
+        col1, col2 = st.columns(2)
+        col1.caption("Per stage, ms")
+        col1.dataframe(latency)
+        recent = pd.DataFrame(metrics["recent"])
+        if not recent.empty:
+            recent.index = pd.to_datetime(recent.pop("time"), unit="s")
+            col2.caption("Recent cycles by stage, ms")
+            col2.bar_chart(recent.drop(columns="cycle").fillna(0) * 1000)
+    except Exception as e:
+        st.warning(f"Metrics load error: {e}")
+
 # --- Bot Log Viewer ---
+# Reads only the newest lines with a backward seek; "Load older" pages back
+# from the byte offset of the oldest line shown.
 st.subheader("🪵 Bot Logs")
 log_path = os.path.join(os.getcwd(), "bot_log.txt")
 if os.path.exists(log_path):
-    with open(log_path, "r") as f:
-        logs = f.read()
-    st.markdown(f'<div class="log-box">{logs}</div>', unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+    log_level = col1.selectbox("Min Level", LEVELS, index=1)
+    log_symbol = col2.text_input("Symbol Filter", "").strip().upper()
+    page_size = col3.number_input("Lines", 50, 1000, 200, step=50)
+
+    view_key = (log_level, log_symbol, page_size)
+    if st.session_state.get("log_view_key") != view_key:
+        st.session_state["log_view_key"] = view_key
+        st.session_state["log_pages"] = 1
+
+    lines, offset = [], None
+    for _ in range(st.session_state["log_pages"]):
+        page, offset = tail_log(log_path, page_size, before=offset, level=log_level, symbol=log_symbol or None)
+        lines = page + lines
+        if offset == 0:
+            break
+
+    st.markdown(f'<div class="log-box">{html.escape(chr(10).join(lines))}</div>', unsafe_allow_html=True)
+    if offset and st.button("⬆️ Load older"):
+        st.session_state["log_pages"] += 1
+        st.rerun()
 else:
     st.info("No bot log file found yet.")
@@ -0,0 +1,263 @@
+# backtest_core.py
+# Vectorized MA crossover + RSI backtest shared by backtest_engine.py and
+# backtest_dashboard.py. Indicators and entry/exit masks are whole-array
+# operations; the long/flat state machine and the execution simulator are
+# single passes over the bars where a signal fired (compiled with numba
+# when it is installed).
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# --- Indicators ---
+def rsi(close, period):
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(period).mean()
+    loss = -delta.where(delta < 0, 0).rolling(period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def ma_rsi_indicators(close, fast_ma, slow_ma, rsi_period):
+    return {
+        "Fast_MA": close.rolling(fast_ma).mean().to_numpy(dtype=float),
+        "Slow_MA": close.rolling(slow_ma).mean().to_numpy(dtype=float),
+        "RSI": rsi(close, rsi_period).to_numpy(dtype=float),
+    }
+
+
+# --- Signal Masks ---
+# NaN compares False, so warm-up bars never produce a signal, exactly like the
+# row-by-row comparisons they replace. Bar 0 has no previous bar. Inputs may be
+# 1-D (one symbol) or 2-D time x symbol arrays.
+def ma_rsi_masks(fast, slow, rsi_values, rsi_buy, rsi_sell):
+    # Entry/exit masks for the long/flat backtest in backtest_engine.py.
+    entry = np.zeros(fast.shape, dtype=bool)
+    exit_ = np.zeros(fast.shape, dtype=bool)
+    cross_up = (fast[:-1] < slow[:-1]) & (fast[1:] > slow[1:])
+    cross_down = (fast[:-1] > slow[:-1]) & (fast[1:] < slow[1:])
+    entry[1:] = cross_up & (rsi_values[1:] < rsi_buy)
+    exit_[1:] = cross_down | (rsi_values[1:] > rsi_sell)
+    return entry, exit_
+
+
+def ma_rsi_signal_masks(fast, slow, rsi_values, rsi_buy, rsi_sell):
+    # Stateless buy/sell markers as drawn by backtest_dashboard.py and traded
+    # live by bot_engine.ma_rsi_combo: trend of the previous bar plus RSI now.
+    buy = np.zeros(fast.shape, dtype=bool)
+    sell = np.zeros(fast.shape, dtype=bool)
+    buy[1:] = (fast[:-1] > slow[:-1]) & (rsi_values[1:] < rsi_buy)
+    sell[1:] = (fast[:-1] < slow[:-1]) & (rsi_values[1:] > rsi_sell)
+    return buy, sell
+
+
+# --- Position State Machine ---
+def _long_flat_kernel(entry, exit_):
+    fills = np.empty(len(entry), dtype=np.int64)
+    n = 0
+    long = False
+    for i in range(len(entry)):
+        if not long:
+            if entry[i]:
+                fills[n] = i
+                n += 1
+                long = True
+        elif exit_[i]:
+            fills[n] = i
+            n += 1
+            long = False
+    return fills[:n]
+
+
+def _long_flat_python(entry, exit_):
+    # Only bars with a signal can change state, so walk just those.
+    candidates = np.flatnonzero(entry | exit_)
+    fills = []
+    long = False
+    for i, is_entry, is_exit in zip(candidates.tolist(), entry[candidates].tolist(), exit_[candidates].tolist()):
+        if not long:
+            if is_entry:
+                fills.append(i)
+                long = True
+        elif is_exit:
+            fills.append(i)
+            long = False
+    return np.asarray(fills, dtype=np.int64)
+
+
+if njit is not None:
+    _long_flat = njit(cache=True)(_long_flat_kernel)
+else:
+    _long_flat = _long_flat_python
+
+
+def long_flat_fills(entry, exit_):
+    # Bar indices of alternating buy/sell fills; a trailing buy is an open trade.
+    return _long_flat(np.ascontiguousarray(entry), np.ascontiguousarray(exit_))
+
+
+# --- Execution Simulator ---
+# Market orders fill `delay` bars after the signal at that bar's open or
+# close, paying half the spread plus slippage. Limit orders rest at the
+# signal close -/+ an offset from the next bar for `ttl` bars and fill when
+# the bar's low/high reaches them (at the open if it gaps through). Signals
+# that arrive while an order is working are ignored; an expired limit leaves
+# the position unchanged. Like the state machine above, the loop only visits
+# bars with a signal plus the bars an order is working on.
+EXECUTION_DEFAULTS = {
+    "fill_at": "next_open",  # or "close" (the signal bar, as long_flat_fills)
+    "latency_bars": 0,  # extra bars before the order reaches the market
+    "spread_bps": 0.0,  # full bid/ask spread
+    "slippage_bps": 0.0,
+    "commission": 0.0,  # $ per share per fill
+    "commission_pct": 0.0,  # % of traded value per fill
+    "order_type": "market",  # or "limit"
+    "limit_offset_bps": 0.0,  # below the signal close for buys, above for sells
+    "limit_ttl_bars": 1,
+}
+
+
+def _execution_kernel(entry, exit_, open_, high, low, close, delay, at_open, is_limit, limit_frac, ttl, cost_frac):
+    n = len(entry)
+    candidates = np.flatnonzero(entry | exit_)
+    fill_bars = np.empty(len(candidates), dtype=np.int64)
+    prices = np.empty(len(candidates), dtype=np.float64)
+    k = 0
+    c = 0
+    start = 0
+    long = False
+    while c < len(candidates):
+        i = candidates[c]
+        c += 1
+        if i < start or not (exit_[i] if long else entry[i]):
+            continue
+        buy = not long
+        if is_limit:
+            limit = close[i] * (1 - limit_frac) if buy else close[i] * (1 + limit_frac)
+            arrival = i + max(delay, 1)
+            filled = -1
+            for j in range(arrival, min(arrival + ttl, n)):
+                if buy and low[j] <= limit:
+                    price = min(open_[j], limit)
+                elif not buy and high[j] >= limit:
+                    price = max(open_[j], limit)
+                else:
+                    continue
+                filled = j
+                break
+            if filled < 0:
+                start = arrival + ttl
+                continue
+        else:
+            filled = i + delay
+            if filled >= n:
+                break
+            price = open_[filled] if at_open else close[filled]
+            price = price * (1 + cost_frac) if buy else price * (1 - cost_frac)
+        fill_bars[k] = filled
+        prices[k] = price
+        k += 1
+        long = not long
+        start = filled + 1
+    return fill_bars[:k], prices[:k]
+
+
+if njit is not None:
+    _execution = njit(cache=True)(_execution_kernel)
+else:
+    _execution = _execution_kernel
+
+
+def simulate_execution(open_, high, low, close, entry, exit_, fill_at="next_open", latency_bars=0,
+                       spread_bps=0.0, slippage_bps=0.0, order_type="market", limit_offset_bps=0.0,
+                       limit_ttl_bars=1, **_costs):
+    """Return (fill_bars, fill_prices) of alternating buy/sell fills.
+
+    Arguments after the masks are the EXECUTION_DEFAULTS keys; commissions
+    are accepted and ignored here (see execution_metrics).
+    """
+    open_, high, low, close = (np.ascontiguousarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    delay = latency_bars + (1 if fill_at == "next_open" else 0)
+    return _execution(
+        np.ascontiguousarray(entry), np.ascontiguousarray(exit_), open_, high, low, close,
+        delay, fill_at == "next_open", order_type == "limit", limit_offset_bps / 1e4, int(limit_ttl_bars),
+        (spread_bps / 2 + slippage_bps) / 1e4,
+    )
+
+
+def execution_metrics(fill_prices, commission=0.0, commission_pct=0.0, **_model):
+    # fill_metrics() for simulated fills, net of commissions (per share and
+    # % of value, charged on both legs).
+    n = len(fill_prices) // 2 * 2
+    entries = fill_prices[0:n:2]
+    exits = fill_prices[1:n:2]
+    costs = 2 * commission + (entries + exits) * commission_pct / 100
+    profits = exits - entries - costs
+    total_trades = len(profits)
+    return {
+        "total_trades": total_trades,
+        "win_rate": (profits > 0).sum() / total_trades * 100 if total_trades else 0,
+        "total_profit": profits.sum(),
+        "return_pct": (profits / entries).sum() * 100,
+    }
+
+
+# --- Trades & Metrics ---
+def fills_to_trades(index, close, fills, prices=None, commission=0.0, commission_pct=0.0):
+    # `prices` (simulated fill prices) replace close[fill]; "Profit" is net
+    # of commissions on both legs.
+    trades = []
+    entry_price = 0
+    for k, i in enumerate(fills.tolist()):
+        price = close[i] if prices is None else float(prices[k])
+        if k % 2 == 0:
+            entry_price = price
+            trades.append({"Date": index[i], "Action": "Buy", "Price": price})
+        else:
+            cost = 2 * commission + (entry_price + price) * commission_pct / 100
+            trades.append({"Date": index[i], "Action": "Sell", "Price": price, "Profit": price - entry_price - cost})
+    return trades
+
+
+def trade_metrics(trades):
+    profits = np.array([t["Profit"] for t in trades if t["Action"] == "Sell"], dtype=float)
+    total_trades = len(profits)
+    return {
+        "total_trades": total_trades,
+        "win_rate": (profits > 0).sum() / total_trades * 100 if total_trades else 0,
+        "total_profit": profits.sum(),
+    }
+
+
+def fill_metrics(close, fills):
+    # trade_metrics() straight from fill indices, without building trade dicts.
+    n = len(fills) // 2 * 2
+    entries = close[fills[0:n:2]]
+    profits = close[fills[1:n:2]] - entries
+    total_trades = len(profits)
+    return {
+        "total_trades": total_trades,
+        "win_rate": (profits > 0).sum() / total_trades * 100 if total_trades else 0,
+        "total_profit": profits.sum(),
+        "return_pct": (profits / entries).sum() * 100,
+    }
+
+
+def backtest_ma_rsi(data, fast_ma, slow_ma, rsi_period, rsi_buy, rsi_sell, execution=None):
+    # Returns (trades, metrics, indicators) for the long/flat MA+RSI rules.
+    # Without `execution` every fill is at the signal bar's close; pass a
+    # dict of EXECUTION_DEFAULTS keys to simulate fills and costs.
+    indicators = ma_rsi_indicators(data["Close"], fast_ma, slow_ma, rsi_period)
+    entry, exit_ = ma_rsi_masks(indicators["Fast_MA"], indicators["Slow_MA"], indicators["RSI"], rsi_buy, rsi_sell)
+    close = data["Close"].to_numpy(dtype=float)
+    if execution is None:
+        trades = fills_to_trades(data.index, close, long_flat_fills(entry, exit_))
+    else:
+        model = {**EXECUTION_DEFAULTS, **execution}
+        fills, prices = simulate_execution(data["Open"], data["High"], data["Low"], close, entry, exit_, **model)
+        trades = fills_to_trades(data.index, close, fills, prices, model["commission"], model["commission_pct"])
+    return trades, trade_metrics(trades), indicators
@@ -1,6 +1,8 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
+from bar_store import get_bars
+from backtest_core import (EXECUTION_DEFAULTS, fills_to_trades, ma_rsi_masks, ma_rsi_signal_masks, rsi,
+                           simulate_execution)
+import numpy as np
 import matplotlib.pyplot as plt
 
 st.set_page_config(page_title="Strategy Backtesting Dashboard", layout="wide")
@@ -34,43 +36,53 @@ rsi_period = st.sidebar.slider("RSI Period", 7, 21, 14)
 rsi_buy = st.sidebar.slider("RSI Buy Threshold", 10, 50, 30)
 rsi_sell = st.sidebar.slider("RSI Sell Threshold", 50, 90, 70)
 
+st.sidebar.header("Execution")
+fill_at = st.sidebar.selectbox("Fill At", ["next_open", "close"])
+order_type = st.sidebar.selectbox("Order Type", ["market", "limit"])
+latency_bars = st.sidebar.number_input("Latency (bars)", 0, 10, 0)
+spread_bps = st.sidebar.number_input("Spread (bps)", 0.0, 100.0, 2.0, step=0.5)
+slippage_bps = st.sidebar.number_input("Slippage (bps)", 0.0, 100.0, 1.0, step=0.5)
+commission = st.sidebar.number_input("Commission ($/share)", 0.0, 1.0, 0.0, step=0.001, format="%.3f")
+limit_offset_bps = st.sidebar.number_input("Limit Offset (bps)", 0.0, 500.0, 10.0, step=1.0)
+limit_ttl_bars = st.sidebar.number_input("Limit TTL (bars)", 1, 50, 3)
+
+# --- Cached Data & Indicator Layers ---
+# Bars are cached per (symbol, period, interval) and each MA window / RSI
+# period separately, so moving a threshold slider only re-evaluates the
+# signal masks below. max_entries bounds memory with LRU eviction; `version`
+# ties indicator entries to the bars they were computed from, closes included,
+# so a revised last bar (or a back-adjusted history) is recomputed.
+@st.cache_data(ttl=300, max_entries=32, show_spinner="Pulling historical data...")
+def load_bars(symbol, period, interval):
+    return get_bars(symbol, period, interval).dropna()
+
+@st.cache_data(max_entries=256)
+def load_ma(symbol, period, interval, version, window):
+    return load_bars(symbol, period, interval)["Close"].rolling(window).mean().to_numpy(dtype=float)
+
+@st.cache_data(max_entries=128)
+def load_rsi(symbol, period, interval, version, rsi_period):
+    return rsi(load_bars(symbol, period, interval)["Close"], rsi_period).to_numpy(dtype=float)
+
 # --- Download Data ---
-st.write(f"Pulling historical data for {symbol}...")
-data = yf.download(symbol, period=period, interval=interval)
-data.dropna(inplace=True)
+data = load_bars(symbol, period, interval).copy()
+version = (len(data), str(data.index[-1]) if len(data) else "", hash(data["Close"].to_numpy(dtype=float).tobytes()))
 
 # --- Calculate Indicators ---
-data["Fast_MA"] = data["Close"].rolling(window=fast_ma).mean()
-data["Slow_MA"] = data["Close"].rolling(window=slow_ma).mean()
-
-# RSI calculation
-delta = data["Close"].diff()
-gain = delta.where(delta > 0, 0).rolling(rsi_period).mean()
-loss = -delta.where(delta < 0, 0).rolling(rsi_period).mean()
-rs = gain / loss
-data["RSI"] = 100 - (100 / (1 + rs))
+data["Fast_MA"] = load_ma(symbol, period, interval, version, fast_ma)
+data["Slow_MA"] = load_ma(symbol, period, interval, version, slow_ma)
+data["RSI"] = load_rsi(symbol, period, interval, version, rsi_period)
 
 # --- Generate Buy/Sell Signals ---
-buy_signals = []
-sell_signals = []
+buy_mask, sell_mask = ma_rsi_signal_masks(
+    data["Fast_MA"].to_numpy(), data["Slow_MA"].to_numpy(), data["RSI"].to_numpy(), rsi_buy, rsi_sell
+)
+close = data["Close"].to_numpy(dtype=float)
 trades = []
-
-for i in range(1, len(data)):
-    prev = data.iloc[i - 1]
-    row = data.iloc[i]
-
-    prev_fast = float(prev["Fast_MA"])
-    prev_slow = float(prev["Slow_MA"])
-    curr_rsi = float(row["RSI"])
-    curr_price = float(row["Close"])
-    date = row.name
-
-    if prev_fast > prev_slow and curr_rsi < rsi_buy:
-        buy_signals.append((date, curr_price))
-        trades.append({"Type": "Buy", "Date": date, "Price": curr_price})
-    elif prev_fast < prev_slow and curr_rsi > rsi_sell:
-        sell_signals.append((date, curr_price))
-        trades.append({"Type": "Sell", "Date": date, "Price": curr_price})
+for i in np.flatnonzero(buy_mask | sell_mask).tolist():
+    trades.append({"Type": "Buy" if buy_mask[i] else "Sell", "Date": data.index[i], "Price": float(close[i])})
+buy_signals = [(t["Date"], t["Price"]) for t in trades if t["Type"] == "Buy"]
+sell_signals = [(t["Date"], t["Price"]) for t in trades if t["Type"] == "Sell"]
 
 # --- Tab 1: Chart ---
 with tab1:
@@ -96,14 +108,20 @@ with tab2:
     st.write(f"Total Buy Signals: {len(buy_signals)}")
     st.write(f"Total Sell Signals: {len(sell_signals)}")
 
-    # Calculate performance metrics
-    buy_prices = [t["Price"] for t in trades if t["Type"] == "Buy"]
-    sell_prices = [t["Price"] for t in trades if t["Type"] == "Sell"]
-    trade_pairs = list(zip(buy_prices, sell_prices))
-
-    profits = [round(sell - buy, 2) for buy, sell in trade_pairs if sell > buy]
-    losses = [round(sell - buy, 2) for buy, sell in trade_pairs if sell < buy]
-    total_trades = len(trade_pairs)
+    # Trades come from the long/flat state machine with simulated fills, so
+    # each sell closes the buy before it.
+    execution = {**EXECUTION_DEFAULTS, "fill_at": fill_at, "order_type": order_type,
+                 "latency_bars": latency_bars, "spread_bps": spread_bps, "slippage_bps": slippage_bps,
+                 "commission": commission, "limit_offset_bps": limit_offset_bps, "limit_ttl_bars": limit_ttl_bars}
+    entry, exit_ = ma_rsi_masks(data["Fast_MA"].to_numpy(), data["Slow_MA"].to_numpy(), data["RSI"].to_numpy(),
+                                rsi_buy, rsi_sell)
+    fills, fill_prices = simulate_execution(data["Open"], data["High"], data["Low"], close, entry, exit_, **execution)
+    sim_trades = fills_to_trades(data.index, close, fills, fill_prices, commission)
+    trade_profits = [t["Profit"] for t in sim_trades if t["Action"] == "Sell"]
+
+    profits = [round(p, 2) for p in trade_profits if p > 0]
+    losses = [round(p, 2) for p in trade_profits if p < 0]
+    total_trades = len(trade_profits)
     profitable_trades = len(profits)
     losing_trades = len(losses)
 
@@ -111,7 +129,7 @@ with tab2:
         win_rate = round((profitable_trades / total_trades) * 100, 2)
         avg_profit = round(sum(profits) / len(profits), 2) if profits else 0
         avg_loss = round(sum(losses) / len(losses), 2) if losses else 0
-        total_return = round(sum(profits + losses), 2)
+        total_return = round(sum(trade_profits), 2)
 
         st.markdown("### 🧮 Performance Metrics")
         st.write(f"Total Trades: {total_trades}")
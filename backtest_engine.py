@@ -1,7 +1,8 @@
 # backtest_engine.py
 
-import yfinance as yf
-import pandas as pd
+from bar_store import get_bars
+from bar_archive import BarArchive
+from backtest_core import backtest_ma_rsi
 import matplotlib.pyplot as plt
 
 # --- Strategy Config ---
@@ -14,68 +15,51 @@ RSI_SELL = 70
 SYMBOL = "AAPL"
 PERIOD = "3mo"
 INTERVAL = "1h"
+# Range read from the local archive (bar_archive.py) when it holds SYMBOL at
+# INTERVAL; None means from the first / up to the last archived bar.
+ARCHIVE_START = None
+ARCHIVE_END = None
+
+# --- Execution Model (see EXECUTION_DEFAULTS in backtest_core.py) ---
+# Orders fill at the next bar's open and pay half the spread, slippage and
+# commission; set EXECUTION = None for the old fill-at-signal-close result.
+EXECUTION = {
+    "fill_at": "next_open",
+    "latency_bars": 0,
+    "spread_bps": 2.0,
+    "slippage_bps": 1.0,
+    "commission": 0.0,
+}
 
 # --- Load Historical Data ---
-print(f"📥 Downloading data for {SYMBOL}...")
-data = yf.download(SYMBOL, period=PERIOD, interval=INTERVAL)
+archive = BarArchive()
+if archive.has(SYMBOL, INTERVAL):
+    print(f"📂 Reading {SYMBOL} from the bar archive...")
+    data = archive.open(SYMBOL, INTERVAL).frame(ARCHIVE_START, ARCHIVE_END)
+else:
+    print(f"📥 Downloading data for {SYMBOL}...")
+    data = get_bars(SYMBOL, PERIOD, INTERVAL)
 data.dropna(inplace=True)
 
-# --- Indicators ---
-data["Fast_MA"] = data["Close"].rolling(FAST_MA).mean()
-data["Slow_MA"] = data["Close"].rolling(SLOW_MA).mean()
-delta = data["Close"].diff()
-gain = delta.where(delta > 0, 0).rolling(RSI_PERIOD).mean()
-loss = -delta.where(delta < 0, 0).rolling(RSI_PERIOD).mean()
-rs = gain / loss
-data["RSI"] = 100 - (100 / (1 + rs))
-
-# --- Backtest Loop ---
-position = None
-entry_price = 0
-trades = []
-
-for i in range(1, len(data)):
-    row = data.iloc[i]
-    prev = data.iloc[i-1]
-
-    # Buy Condition
-    if position is None:
-        if (
-            prev["Fast_MA"] < prev["Slow_MA"] and row["Fast_MA"] > row["Slow_MA"]
-            and row["RSI"] < RSI_BUY
-        ):
-            position = "long"
-            entry_price = row["Close"]
-            trades.append({"Date": row.name, "Action": "Buy", "Price": row["Close"]})
-
-    # Sell Condition
-    elif position == "long":
-        if (
-            prev["Fast_MA"] > prev["Slow_MA"] and row["Fast_MA"] < row["Slow_MA"]
-            or row["RSI"] > RSI_SELL
-        ):
-            profit = row["Close"] - entry_price
-            trades.append({"Date": row.name, "Action": "Sell", "Price": row["Close"], "Profit": profit})
-            position = None
+# --- Backtest ---
+trades, metrics, indicators = backtest_ma_rsi(data, FAST_MA, SLOW_MA, RSI_PERIOD, RSI_BUY, RSI_SELL, EXECUTION)
+data["Fast_MA"] = indicators["Fast_MA"]
+data["Slow_MA"] = indicators["Slow_MA"]
+data["RSI"] = indicators["RSI"]
 
 # --- Results ---
-trades_df = pd.DataFrame(trades)
-profits = trades_df[trades_df["Action"] == "Sell"]["Profit"]
-total_profit = profits.sum()
-win_rate = (profits > 0).sum() / len(profits) * 100 if len(profits) else 0
-
 print("\n📊 Backtest Results")
 print("------------------")
-print(f"Total Trades: {len(profits)}")
-print(f"Win Rate: {win_rate:.2f}%")
-print(f"Total Profit: ${total_profit:.2f}")
+print(f"Total Trades: {metrics['total_trades']}")
+print(f"Win Rate: {metrics['win_rate']:.2f}%")
+print(f"Total Profit: ${metrics['total_profit']:.2f}")
 
 # --- Plot ---
 plt.figure(figsize=(15,6))
 plt.plot(data["Close"], label="Close", color="black")
 plt.plot(data["Fast_MA"], label=f"MA{FAST_MA}", linestyle="--")
 plt.plot(data["Slow_MA"], label=f"MA{SLOW_MA}", linestyle=":")
-for _, t in trades_df.iterrows():
+for t in trades:
     color = "green" if t["Action"] == "Buy" else "red"
     marker = "^" if t["Action"] == "Buy" else "v"
     plt.plot(t["Date"], t["Price"], marker=marker, color=color, markersize=10)
@@ -0,0 +1,248 @@
+# bar_archive.py
+# Long-history bar archive for research backtests. Each (interval, symbol)
+# is a directory of fixed-width binary columns (timestamp int64 ns UTC,
+# OHLC float32/float64, volume float64) plus a small meta.json. Columns are
+# opened as read-only memory maps, so opening years of minute bars costs
+# nothing until a range is touched, and a time range is located by binary
+# search on the timestamp column.
+#
+#   python bar_archive.py import dumps/AAPL_1m.csv --symbol AAPL --interval 1m
+#   python bar_archive.py import dumps/minute_bars.parquet --interval 1m   # has a symbol column
+#   python bar_archive.py info --interval 1m
+
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+ARCHIVE_DIR = os.getenv("BAR_ARCHIVE_DIR", "bar_archive")
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+COLUMNS = PRICE_COLUMNS + ["Volume"]
+TIME_NAMES = ["timestamp", "time", "datetime", "date", "t"]
+CHUNK_ROWS = 1_000_000
+
+
+def _parse_time(value, tz):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(tz)
+    return ts.tz_convert("UTC").value
+
+
+# --- Reading ---
+class ArchivedBars:
+    """Memory-mapped bars for one symbol and interval.
+
+    `timestamps` and `column(name)` are read-only np.memmap arrays; nothing
+    is read from disk until they are indexed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.rows = self.meta["rows"]
+        self.tz = self.meta.get("tz", "UTC")
+        self.timestamps = self._map("ts", np.int64)
+
+    def _map(self, name, dtype):
+        if not self.rows:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode="r", shape=(self.rows,))
+
+    def column(self, name):
+        dtype = self.meta["price_dtype"] if name in PRICE_COLUMNS else "float64"
+        return self._map(name.lower(), np.dtype(dtype))
+
+    def __len__(self):
+        return self.rows
+
+    def span(self):
+        if not self.rows:
+            return None, None
+        return (pd.Timestamp(int(self.timestamps[0]), tz="UTC").tz_convert(self.tz),
+                pd.Timestamp(int(self.timestamps[-1]), tz="UTC").tz_convert(self.tz))
+
+    def locate(self, start=None, end=None):
+        # Row range [lo, hi) for start <= t < end; naive times are read in the
+        # archive's timezone.
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, _parse_time(start, self.tz), "left"))
+        hi = self.rows if end is None else int(np.searchsorted(self.timestamps, _parse_time(end, self.tz), "left"))
+        return lo, max(lo, hi)
+
+    def arrays(self, start=None, end=None, columns=COLUMNS):
+        # {"ts": ..., "Open": ..., ...} as zero-copy memmap slices.
+        lo, hi = self.locate(start, end)
+        out = {"ts": self.timestamps[lo:hi]}
+        for name in columns:
+            out[name] = self.column(name)[lo:hi]
+        return out
+
+    def frame(self, start=None, end=None, columns=COLUMNS):
+        # The same shape of DataFrame bar_store.get_bars() returns, for the
+        # requested range only.
+        data = self.arrays(start, end, columns)
+        index = pd.DatetimeIndex(np.asarray(data.pop("ts")).view("datetime64[ns]"), tz="UTC").tz_convert(self.tz)
+        return pd.DataFrame({name: np.asarray(values, dtype=float) for name, values in data.items()}, index=index)
+
+
+class BarArchive:
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, interval, symbol.upper())
+
+    def has(self, symbol, interval):
+        return os.path.exists(os.path.join(self._dir(symbol, interval), "meta.json"))
+
+    def open(self, symbol, interval):
+        return ArchivedBars(self._dir(symbol, interval))
+
+    def symbols(self, interval):
+        return sorted(os.path.basename(os.path.dirname(p))
+                      for p in glob.glob(os.path.join(self.root, interval, "*", "meta.json")))
+
+    # --- Writing ---
+    def append(self, symbol, interval, df, price_dtype="float32", tz=None):
+        """Append bars newer than the last archived one; returns rows written.
+
+        `df` has a DatetimeIndex and OHLCV columns. Rows at or before the
+        archive's last timestamp are skipped, so re-importing a dump is a
+        no-op. Columns are written first and meta.json (with the row count
+        readers trust) last, so an interrupted append is simply ignored.
+        """
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        else:
+            # Frames come back in the timezone of the first import.
+            index_tz = str(df.index.tz) if df.index.tz is not None else tz or "UTC"
+            meta = {"rows": 0, "price_dtype": price_dtype, "tz": index_tz, "last_ts": None}
+
+        index = df.index if df.index.tz is not None else df.index.tz_localize(meta["tz"])
+        ts = index.tz_convert("UTC").as_unit("ns").asi8
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.ones(len(ts), dtype=bool)
+        keep[1:] = ts[1:] != ts[:-1]  # duplicate timestamps within the chunk
+        if meta["last_ts"] is not None:
+            keep &= ts > meta["last_ts"]
+        rows = order[keep]
+        if not len(rows):
+            return 0
+
+        columns = {"ts": ts[keep]}
+        for name in COLUMNS:
+            dtype = meta["price_dtype"] if name in PRICE_COLUMNS else "float64"
+            values = df[name].to_numpy()[rows] if name in df else np.full(len(rows), np.nan)
+            columns[name.lower()] = values.astype(dtype)
+        for name, values in columns.items():
+            # Trim any bytes left by an interrupted append before extending.
+            file_path = os.path.join(path, f"{name}.bin")
+            with open(file_path, "ab") as f:
+                f.truncate(meta["rows"] * values.itemsize)
+                f.write(values.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        meta["rows"] += len(rows)
+        meta["last_ts"] = int(columns["ts"][-1])
+        tmp = meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+        return len(rows)
+
+
+# --- Import ---
+def _normalize(df, tz):
+    # Map a dump's columns onto OHLCV with a DatetimeIndex.
+    renamed = {c: c.capitalize() for c in df.columns if c.capitalize() in COLUMNS}
+    renamed.update({c: "Symbol" for c in df.columns if c.lower() in ("symbol", "ticker")})
+    df = df.rename(columns=renamed)
+    if not isinstance(df.index, pd.DatetimeIndex):
+        time_col = next((c for c in df.columns if c.lower() in TIME_NAMES), None)
+        if time_col is None:
+            raise ValueError(f"No timestamp column (one of {TIME_NAMES}) in {list(df.columns)}")
+        values = df.pop(time_col)
+        if pd.api.types.is_numeric_dtype(values):
+            # Epoch seconds / ms / ns, by magnitude.
+            unit = "s" if values.abs().max() < 1e11 else "ms" if values.abs().max() < 1e14 else "ns"
+            df.index = pd.to_datetime(values, unit=unit, utc=True)
+        elif values.empty or pd.Timestamp(values.iloc[0]).tzinfo is None:
+            df.index = pd.to_datetime(values)
+        else:
+            # Offset-stamped rows change offset at DST (-05:00 / -04:00), so
+            # parse them as UTC and show them in `tz`.
+            df.index = pd.to_datetime(values, utc=True).dt.tz_convert(tz)
+    if df.index.tz is None:
+        df.index = df.index.tz_localize(tz)
+    return df
+
+
+def _chunks(path, chunk_rows):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def import_file(path, interval, symbol=None, archive=None, tz="UTC", price_dtype="float32", chunk_rows=CHUNK_ROWS):
+    """Stream a CSV or Parquet dump into the archive; returns {symbol: rows added}.
+
+    Without `symbol` the dump must have a symbol/ticker column. Dumps are
+    read in chunks, so files larger than memory import fine as long as each
+    symbol's rows are in time order across chunks.
+    """
+    archive = archive or BarArchive()
+    added = {}
+    for chunk in _chunks(path, chunk_rows):
+        chunk = _normalize(chunk, tz)
+        if symbol:
+            groups = [(symbol, chunk)]
+        elif "Symbol" in chunk:
+            groups = chunk.groupby("Symbol", sort=False)
+        else:
+            raise ValueError(f"{path} has no symbol column; pass symbol=")
+        for sym, group in groups:
+            n = archive.append(str(sym), interval, group, price_dtype=price_dtype, tz=tz)
+            added[str(sym).upper()] = added.get(str(sym).upper(), 0) + n
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory-mapped bar archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="import CSV/Parquet dumps")
+    imp.add_argument("paths", nargs="+")
+    imp.add_argument("--interval", required=True, help="e.g. 1m, 15m, 1h")
+    imp.add_argument("--symbol", help="for single-symbol dumps without a symbol column")
+    imp.add_argument("--tz", default="UTC", help="timezone of naive timestamps in the dump and of the archived bars")
+    imp.add_argument("--price-dtype", choices=["float32", "float64"], default="float32")
+    info = sub.add_parser("info", help="list archived symbols")
+    info.add_argument("--interval", required=True)
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    archive = BarArchive(args.root)
+    if args.command == "import":
+        for path in args.paths:
+            print(f"📥 Importing {path}...")
+            added = import_file(path, args.interval, args.symbol, archive, args.tz, args.price_dtype)
+            for sym, n in sorted(added.items()):
+                print(f"   {sym}: {n:,} bars added")
+    else:
+        for sym in archive.symbols(args.interval):
+            bars = archive.open(sym, args.interval)
+            first, last = bars.span()
+            print(f"{sym:<8} {len(bars):>12,} bars  {first} → {last}")
@@ -0,0 +1,167 @@
+# bar_store.py
+# Local on-disk OHLCV cache shared by bot_engine.py, backtest_engine.py and
+# backtest_dashboard.py. Bars are kept per (symbol, interval) as Parquet files
+# and only the missing tail since the last cached bar is fetched from yfinance.
+
+import os
+import re
+from datetime import timedelta
+
+import pandas as pd
+
+CACHE_DIR = os.getenv("BAR_CACHE_DIR", "bar_cache")
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Slack allowed between the requested window start and the first cached bar
+# (weekends / holidays mean a fresh download never starts exactly on it).
+COVERAGE_SLACK = timedelta(days=5)
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+# --- Period Helpers ---
+def _parse_period(period):
+    match = _PERIOD_RE.match(period)
+    if not match:
+        return None, None
+    return int(match.group(1)), match.group(2)
+
+
+def _period_offset(n, unit):
+    if unit == "wk":
+        return pd.DateOffset(weeks=n)
+    if unit == "mo":
+        return pd.DateOffset(months=n)
+    return pd.DateOffset(years=n)
+
+
+def _now_like(index):
+    return pd.Timestamp.now(tz=index.tz) if index.tz is not None else pd.Timestamp.now()
+
+
+def _session_dates(index):
+    return pd.Index(index.date).unique()
+
+
+def _covers(df, period):
+    # True when the cached frame holds the full requested window and its last
+    # bar is recent enough that topping up the tail is cheaper than a refetch.
+    if df.empty:
+        return False
+    n, unit = _parse_period(period)
+    now = _now_like(df.index)
+    if unit == "d":
+        # yfinance counts "Nd" in trading sessions, not calendar days
+        fresh_enough = df.index[-1] >= now - timedelta(days=n) - COVERAGE_SLACK
+        return fresh_enough and len(_session_dates(df.index)) >= n
+    start = now - _period_offset(n, unit)
+    return df.index[0] <= start + COVERAGE_SLACK and df.index[-1] >= start
+
+
+def _slice(df, period):
+    if df.empty:
+        return df
+    n, unit = _parse_period(period)
+    if unit == "d":
+        keep = _session_dates(df.index)[-n:]
+        return df[pd.Index(df.index.date).isin(keep)].copy()
+    start = _now_like(df.index) - _period_offset(n, unit)
+    return df[df.index >= start].copy()
+
+
+# --- Disk I/O ---
+def _path(symbol, interval):
+    return os.path.join(CACHE_DIR, interval, f"{symbol.upper()}.parquet")
+
+
+def _load(symbol, interval):
+    path = _path(symbol, interval)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COLUMNS)
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        print(f"⚠️ Corrupt bar cache {path}, refetching: {e}")
+        return pd.DataFrame(columns=COLUMNS)
+
+
+def _save(symbol, interval, df):
+    path = _path(symbol, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+# --- Download ---
+def _normalize(df):
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    return df[[c for c in COLUMNS if c in df.columns]].dropna()
+
+
+def _download(symbols, interval, **kwargs):
+    # One multi-ticker request; the wide (ticker, field) frame is split back
+    # into a plain OHLCV frame per symbol. yfinance is only imported on a cache
+    # miss; it is by far the slowest import on the bot's path.
+    import yfinance as yf
+
+    wide = yf.download(list(symbols), interval=interval, group_by="ticker",
+                       auto_adjust=True, progress=False, **kwargs)
+    if wide is None or wide.empty:
+        return {s: _normalize(None) for s in symbols}
+    if not isinstance(wide.columns, pd.MultiIndex):
+        return {symbols[0]: _normalize(wide)}
+    tickers = set(wide.columns.get_level_values(0))
+    return {s: _normalize(wide[s] if s in tickers else None) for s in symbols}
+
+
+def _merge(cached, fresh):
+    if cached.empty:
+        return fresh
+    if fresh.empty:
+        return cached
+    df = pd.concat([cached, fresh])
+    # The last cached bar may have been partial; the fresh copy wins.
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index()
+
+
+# --- Public API ---
+def get_bars_many(symbols, period, interval):
+    """Return {symbol: OHLCV bars covering `period`} using batched requests."""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    if _parse_period(period)[0] is None:
+        # "max", "ytd" etc. have no fixed window to cache against
+        return _download(symbols, interval, period=period)
+
+    cached = {s: _load(s, interval) for s in symbols}
+    warm = [s for s in symbols if _covers(cached[s], period)]
+    cold = [s for s in symbols if s not in warm]
+
+    # At most two requests per cycle: a tail top-up for every warm symbol
+    # (from the oldest last bar among them) and a full window for the rest.
+    fresh = {}
+    if warm:
+        since = min(cached[s].index[-1] for s in warm)
+        fresh.update(_download(warm, interval, start=since))
+    if cold:
+        fresh.update(_download(cold, interval, period=period))
+
+    result = {}
+    for s in symbols:
+        bars = _merge(cached[s], fresh[s])
+        if not fresh[s].empty:
+            _save(s, interval, bars)
+        result[s] = _slice(bars, period)
+    return result
+
+
+def get_bars(symbol, period, interval):
+    """Return OHLCV bars for `symbol` covering `period`, like yf.download."""
+    return get_bars_many([symbol], period, interval)[symbol]
@@ -0,0 +1,230 @@
+# benchmark.py
+# Offline benchmark harness. Generates deterministic geometric-Brownian-motion
+# OHLCV bars, times the indicator, signal, backtest, live-strategy and
+# portfolio paths at several sizes, records peak memory, and writes a JSON
+# report that can be compared against a stored baseline.
+#
+#   python benchmark.py --sizes 1000 10000 100000 --out benchmark_report.json
+#   python benchmark.py --baseline benchmark_baseline.json   # exit 1 on regression
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import backtest_core
+from backtest_core import backtest_ma_rsi, ma_rsi_indicators, ma_rsi_signal_masks
+from indicators import IndicatorStore, MaRsiState
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_SYMBOLS = 50
+DEFAULT_REPEATS = 3
+DEFAULT_TOLERANCE = 0.25
+
+# Same defaults as settings.json / backtest_engine.py.
+MA_RSI = {"fast_ma": 5, "slow_ma": 20, "rsi_period": 14, "rsi_buy": 30, "rsi_sell": 70}
+
+
+# --- Synthetic Data ---
+def synthetic_bars(n_bars, n_symbols=1, seed=0, freq="15min", start="2024-01-02 09:30",
+                   mu=0.0, sigma=0.004, start_price=100.0):
+    """Return {symbol: OHLCV frame} of geometric Brownian motion bars.
+
+    The same (n_bars, n_symbols, seed) always produces the same data. Open is
+    the previous close; High/Low bracket Open and Close by a random wick.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_bars, freq=freq, tz="America/New_York")
+    returns = rng.normal(mu - sigma ** 2 / 2, sigma, (n_bars, n_symbols))
+    close = start_price * np.exp(np.cumsum(returns, axis=0))
+    open_ = np.vstack([np.full((1, n_symbols), start_price), close[:-1]])
+    wick = np.abs(rng.normal(0, sigma / 2, (2, n_bars, n_symbols)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.integers(1_000, 100_000, (n_bars, n_symbols))
+    return {
+        f"SYM{j:03d}": pd.DataFrame({"Open": open_[:, j], "High": high[:, j], "Low": low[:, j],
+                                     "Close": close[:, j], "Volume": volume[:, j]}, index=index)
+        for j in range(n_symbols)
+    }
+
+
+# --- Cases ---
+# Each case takes {symbol: bars} and returns a zero-argument callable to time;
+# setup done here is excluded from the measurement.
+def case_indicators(bars):
+    close = next(iter(bars.values()))["Close"]
+    return lambda: ma_rsi_indicators(close, MA_RSI["fast_ma"], MA_RSI["slow_ma"], MA_RSI["rsi_period"])
+
+
+def case_signals(bars):
+    # The dashboard's buy/sell markers.
+    close = next(iter(bars.values()))["Close"]
+    ind = ma_rsi_indicators(close, MA_RSI["fast_ma"], MA_RSI["slow_ma"], MA_RSI["rsi_period"])
+    return lambda: ma_rsi_signal_masks(ind["Fast_MA"], ind["Slow_MA"], ind["RSI"],
+                                       MA_RSI["rsi_buy"], MA_RSI["rsi_sell"])
+
+
+def case_backtest(bars):
+    df = next(iter(bars.values()))
+    return lambda: backtest_ma_rsi(df, **MA_RSI)
+
+
+def _strategy_case(bars, state_cls, params, warm):
+    # What the bot's strategy functions do each cycle: bring the persisted
+    # indicator state up to date with the latest bars. Cold reseeds from the whole
+    # series; warm has one new bar to commit since the last cycle.
+    close = next(iter(bars.values()))["Close"]
+    with tempfile.TemporaryDirectory() as directory:
+        store = IndicatorStore(os.path.join(directory, "state.json"))  # never saved
+    if warm:
+        store.sync("bench", state_cls, params, close.iloc[:-1])
+        entry = dict(store.entries["bench"])
+
+    def run():
+        if warm:
+            store.entries["bench"] = entry
+        else:
+            store.entries.clear()
+        return store.sync("bench", state_cls, params, close)
+    return run
+
+
+MA_RSI_STATE = (MA_RSI["fast_ma"], MA_RSI["slow_ma"], MA_RSI["rsi_period"])
+
+
+def case_strategy_cold(bars):
+    return _strategy_case(bars, MaRsiState, MA_RSI_STATE, False)
+
+
+def case_strategy_warm(bars):
+    return _strategy_case(bars, MaRsiState, MA_RSI_STATE, True)
+
+
+def case_portfolio(bars):
+    # Imported here so the single-symbol cases don't need bar_store's deps.
+    from portfolio_backtest import run_portfolio
+    return lambda: run_portfolio(bars, "ma_rsi_combo", {"rsi_buy": 55})
+
+
+# name -> (factory, uses the multi-symbol universe)
+CASES = {
+    "indicators": (case_indicators, False),
+    "signals": (case_signals, False),
+    "backtest": (case_backtest, False),
+    "strategy_cold": (case_strategy_cold, False),
+    "strategy_warm": (case_strategy_warm, False),
+    "portfolio": (case_portfolio, True),
+}
+
+
+# --- Measurement ---
+def measure(fn, repeats=DEFAULT_REPEATS):
+    # Times are taken without tracemalloc (it slows allocation-heavy code);
+    # peak memory comes from one extra traced run.
+    fn()  # warm-up: imports, numba compilation, caches
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "median_seconds": statistics.median(times), "peak_mb": peak / 1e6}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, symbols=DEFAULT_SYMBOLS, cases=None, repeats=DEFAULT_REPEATS, seed=0):
+    results = []
+    for size in sizes:
+        single = synthetic_bars(size, 1, seed)
+        universe = None
+        for name in cases or CASES:
+            factory, multi = CASES[name]
+            if multi and universe is None:
+                universe = synthetic_bars(size, symbols, seed)
+            bars = universe if multi else single
+            result = {"case": name, "bars": size, "symbols": len(bars)}
+            result.update(measure(factory(bars), repeats))
+            results.append(result)
+            print(f"⏱️ {name:<14} {size:>8} bars x {len(bars):<3} "
+                  f"{result['seconds'] * 1000:10.2f} ms  {result['peak_mb']:8.1f} MB")
+    return results
+
+
+def environment():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": backtest_core.njit is not None,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+# --- Baseline Comparison ---
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return the rows slower (or larger) than the baseline by more than `tolerance`.
+
+    Rows are matched on (case, bars, symbols); cases missing from either side
+    are ignored.
+    """
+    reference = {(r["case"], r["bars"], r["symbols"]): r for r in baseline["results"]}
+    regressions = []
+    for row in results:
+        base = reference.get((row["case"], row["bars"], row["symbols"]))
+        if not base:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if base[metric] > 0 and row[metric] > base[metric] * (1 + tolerance):
+                regressions.append({"case": row["case"], "bars": row["bars"], "symbols": row["symbols"],
+                                    "metric": metric, "baseline": base[metric], "current": row[metric],
+                                    "ratio": row[metric] / base[metric]})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline backtest/strategy benchmarks on synthetic bars")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="bars per series")
+    parser.add_argument("--symbols", type=int, default=DEFAULT_SYMBOLS, help="symbols in the portfolio case")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), help="default: all")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark_report.json")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown, e.g. 0.25 = 25%%")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.symbols, args.cases, args.repeats, args.seed)
+    report = {"environment": environment(), "seed": args.seed, "repeats": args.repeats, "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if not regressions:
+            print(f"✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        else:
+            print(f"❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for r in regressions:
+                print(f"   {r['case']} {r['bars']} bars x {r['symbols']}: {r['metric']} "
+                      f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)")
+            sys.exit(1)
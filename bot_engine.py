@@ -1,23 +1,20 @@
 import os
 import json
+import argparse
+import signal
+import time
 from dotenv import load_dotenv
-import pandas as pd
-import yfinance as yf
+from scheduler import BarScheduler, is_market_open
+from order_book import OrderBook, stream_trade_updates
+from log_sink import LogSink
+from journal import Journal, recover as recover_journal
+from metrics import METRICS, serve as serve_metrics
 from datetime import datetime
-from alpaca_trade_api.rest import REST
-import requests
-import pytz
-import numpy as np
 
-# --- Market Hours Check ---
-def is_market_open():
-    eastern = pytz.timezone('US/Eastern')
-    now = datetime.now(eastern)
-    return now.weekday() < 5 and datetime.strptime("09:30", "%H:%M").time() <= now.time() <= datetime.strptime("16:00", "%H:%M").time()
-
-if not is_market_open():
-    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Market is closed. Bot will not run.")
-    exit()
+# Only standard-library modules are imported above, so a closed-market run
+# exits without loading pandas, yfinance, requests or alpaca_trade_api. Those
+# come in through the get_* accessors below on first use and each client is
+# built once per process.
 
 # --- Load Environment Variables ---
 load_dotenv()
@@ -28,156 +25,274 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
 # --- Load Strategy Settings from JSON ---
+# Re-read only when the file changes, so a long-running daemon picks up edits
+# from the Streamlit settings tab without re-parsing every cycle.
 settings_path = "settings.json"
-if os.path.exists(settings_path):
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-else:
-    settings = {}
+settings = {}
+_settings_mtime = None
 
-strategy = settings.get("strategy", "ma_rsi_combo")
+def refresh_settings():
+    global settings, _settings_mtime
+    mtime = os.path.getmtime(settings_path) if os.path.exists(settings_path) else None
+    if mtime != _settings_mtime:
+        if mtime is None:
+            settings = {}
+        else:
+            with open(settings_path, "r") as f:
+                settings = json.load(f)
+        _settings_mtime = mtime
+    return settings
 
-# --- Initialize Alpaca API ---
-api = REST(API_KEY, API_SECRET, BASE_URL)
+# --- Indicator State (persisted so each run only feeds the newest bars) ---
+indicator_store = None
 
-# --- Notification Functions ---
-def send_telegram(message):
-    try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-        payload = {"chat_id": TELEGRAM_CHAT_ID, "text": message}
-        response = requests.post(url, json=payload)
-        if response.status_code != 200:
-            print("Telegram error:", response.text)
-    except Exception as e:
-        print(f"Telegram send failed: {e}")
-
-def sound_alert(message="Trade executed"):
-    os.system(f'say "{message}"')
-
-def log(message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    full_message = f"[{timestamp}] {message}"
-    print(full_message)
-    with open("bot_log.txt", "a") as f:
-        f.write(full_message + "\n")
-
-# --- STRATEGY: MA + RSI COMBO ---
-def ma_rsi_combo(symbol):
-    df = yf.download(symbol, period="5d", interval="15m", auto_adjust=True)
-    if df.empty: return None
-
-    fast_ma = settings.get("fast_ma", 5)
-    slow_ma = settings.get("slow_ma", 20)
-    rsi_period = settings.get("rsi_period", 14)
-    rsi_buy = settings.get("rsi_buy", 30)
-    rsi_sell = settings.get("rsi_sell", 70)
-
-    df["Fast_MA"] = df["Close"].rolling(window=fast_ma).mean()
-    df["Slow_MA"] = df["Close"].rolling(window=slow_ma).mean()
-    delta = df["Close"].diff()
-    gain = delta.where(delta > 0, 0).rolling(rsi_period).mean()
-    loss = -delta.where(delta < 0, 0).rolling(rsi_period).mean()
-    rs = gain / loss
-    df["RSI"] = 100 - (100 / (1 + rs))
-
-    fast_prev = df["Fast_MA"].iloc[-2]
-    slow_prev = df["Slow_MA"].iloc[-2]
-    rsi_now = df["RSI"].iloc[-1]
-
-    if fast_prev > slow_prev and rsi_now < rsi_buy:
-        return "buy"
-    elif fast_prev < slow_prev and rsi_now > rsi_sell:
-        return "sell"
-    return None
-
-# --- STRATEGY: Bollinger Band + RSI ---
-def bollinger_rsi(symbol):
-    df = yf.download(symbol, period="5d", interval="15m", auto_adjust=True)
-    if df.empty: return None
-
-    window = settings.get("bollinger_window", 20)
-    std_dev = settings.get("bollinger_std_dev", 2)
-    rsi_thresh = settings.get("bollinger_rsi_thresh", 35)
-    rsi_period = settings.get("rsi_period", 14)
-
-    df["MA"] = df["Close"].rolling(window=window).mean()
-    df["STD"] = df["Close"].rolling(window=window).std()
-    df["Upper"] = df["MA"] + std_dev * df["STD"]
-    df["Lower"] = df["MA"] - std_dev * df["STD"]
-
-    delta = df["Close"].diff()
-    gain = delta.where(delta > 0, 0).rolling(rsi_period).mean()
-    loss = -delta.where(delta < 0, 0).rolling(rsi_period).mean()
-    rs = gain / loss
-    df["RSI"] = 100 - (100 / (1 + rs))
-
-    price = df["Close"].iloc[-1]
-    rsi_now = df["RSI"].iloc[-1]
-
-    if price < df["Lower"].iloc[-1] and rsi_now < rsi_thresh:
-        return "buy"
-    elif price > df["Upper"].iloc[-1] and rsi_now > 100 - rsi_thresh:
-        return "sell"
-    return None
-
-# --- STRATEGY: Pairs Trading Z-Score ---
-def pairs_zscore():
-    pair = settings.get("pairs", {}).get("symbols", ["AAPL", "MSFT"])
-    lookback = settings.get("pairs", {}).get("lookback_days", 15)
-    entry_z = settings.get("pairs", {}).get("entry_zscore", 2.0)
-    exit_z = settings.get("pairs", {}).get("exit_zscore", 0.5)
-
-    df1 = yf.download(pair[0], period=f"{lookback + 5}d", interval="1h")["Close"]
-    df2 = yf.download(pair[1], period=f"{lookback + 5}d", interval="1h")["Close"]
-    df = pd.DataFrame({"x": df1, "y": df2}).dropna()
-
-    spread = df["x"] - df["y"]
-    mean = spread.rolling(window=lookback).mean()
-    std = spread.rolling(window=lookback).std()
-    zscore = (spread - mean) / std
-
-    z_now = zscore.iloc[-1]
-    if z_now > entry_z:
-        return pair[0], "sell", pair[1], "buy"
-    elif z_now < -entry_z:
-        return pair[0], "buy", pair[1], "sell"
-    elif abs(z_now) < exit_z:
-        return "exit"
-    return None
+def get_indicator_store():
+    global indicator_store
+    if indicator_store is None:
+        from indicators import IndicatorStore
+        indicator_store = IndicatorStore("indicator_state.json")
+    return indicator_store
+
+def save_indicator_state():
+    if indicator_store is not None:
+        indicator_store.save()
+
+# --- Initialize Alpaca API (once per process) ---
+api = None
+
+def get_api():
+    global api
+    if api is None:
+        from alpaca_trade_api.rest import REST
+        api = REST(APCA_API_KEY_ID, APCA_API_SECRET_KEY, APCA_API_BASE_URL)
+    return api
+
+# --- Logging & Notifications (queued, see execution.py) ---
+log_sink = LogSink("bot_log.txt")
+
+def log(message, level="INFO", symbol=None):
+    print(log_sink.write(message, level=level, symbol=symbol))
+
+notifier = None
+
+def get_notifier():
+    global notifier
+    if notifier is None:
+        from execution import Notifier
+        notifier = Notifier(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, log=log)
+    return notifier
+
+def close_notifier():
+    if notifier is not None:
+        notifier.close()
+
+# --- Latency Metrics (per-stage cycle histograms, shown in the dashboard) ---
+METRICS.load("metrics.json")
+
+# --- Strategies (registry and shared indicator graph, see strategies.py) ---
+engine = None
+
+def get_engine():
+    global engine
+    if engine is None:
+        from strategies import StrategyEngine
+        engine = StrategyEngine(get_indicator_store(), log=log)
+    return engine
+
+# --- Position & Order Book (seeded once, kept current by trade_updates) ---
+order_book = OrderBook(log=log)
+
+# --- Event Journal (bars, signals, orders, fills; see journal.py) ---
+journal = Journal("journal.jsonl")
+
+def reconcile_book(force=False):
+    # Every REST seed of the book is journaled as the new recovery point.
+    synced_at = order_book.synced_at
+    order_book.reconcile(get_api(), force=force)
+    if order_book.synced_at != synced_at:
+        journal.book(order_book)
+
+def restore_book(rings=None, symbols=None, session=None):
+    # Long-running modes start from the journal instead of REST. The restored
+    # book is not marked synced, so the first cycle with orders reconciles it
+    # and picks up fills missed while the bot was down. Stream mode passes its
+    # rings, symbols and session too, so the journal is read once.
+    counts = recover_journal(journal.path, book=order_book, rings=rings, symbols=symbols, session=session) or {}
+    if "book" in counts:
+        book_events = sum(n for kind, n in counts.items() if kind != "bar")
+        log(f"♻️ Order book restored from {journal.path} ({book_events} events).")
+    else:
+        reconcile_book(force=True)
+
+async def on_trade_update(update):
+    order_book.on_trade_update(update)
+    journal.trade_update(update)
 
 # --- MAIN BOT EXECUTION ---
+def execute_trades(orders):
+    # All of a cycle's orders go out concurrently; notifications are queued.
+    # The order book drops repeats of positions or orders already in place
+    # and is re-checked against REST every few minutes.
+    from execution import execute_orders
+
+    if orders:
+        reconcile_book()
+    results = execute_orders(get_api(), orders, get_notifier(), log=log, book=order_book)
+    journal.orders(orders, results)
+    return results
+
 def execute_trade(symbol, action):
+    return execute_trades([(symbol, action)])
+
+def evaluate_signals(strategies, symbols, bars=None):
+    # Runs the strategies over the given bars and returns [(symbol, side), ...].
+    return get_engine().evaluate(strategies, settings, symbols, bars)
+
+def run_cycle():
+    from strategies import active_strategies
+
+    refresh_settings()
+    strategies = active_strategies(settings)
+    symbols = settings.get("symbols", ["AAPL", "MSFT", "GOOGL"])
+
+    # The engine fetches each bar set the active strategies need in one
+    # batched request and computes every shared indicator once.
+    with METRICS.cycle():
+        orders = evaluate_signals(strategies, symbols)
+        journal.signals(orders)
+        execute_trades(orders)
+    save_indicator_state()
+    METRICS.save()
+    journal.flush()
+    log("🤖 Bot run complete.")
+    log_sink.flush()
+
+# --- Daemon Mode ---
+# Keeps the interpreter, REST client, settings and indicator state warm and
+# runs one cycle after each bar close instead of being relaunched by cron.
+def run_daemon(interval_minutes=15):
+    scheduler = BarScheduler(interval_minutes)
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+    signal.signal(signal.SIGINT, lambda *_: scheduler.stop())
+    log(f"🟢 Bot daemon started ({interval_minutes}m bars).")
+    restore_book()
+    trade_updates = stream_trade_updates(order_book, APCA_API_KEY_ID, APCA_API_SECRET_KEY, APCA_API_BASE_URL,
+                                         handler=on_trade_update)
+
+    while not scheduler.stopped:
+        wake = scheduler.next_run()
+        if not is_market_open():
+            log(f"💤 Market closed. Sleeping until {wake.strftime('%Y-%m-%d %H:%M:%S %Z')}.")
+        if scheduler.sleep_until(wake):
+            break
+        try:
+            run_cycle()
+        except Exception as e:
+            log(f"Cycle error: {e}", level="ERROR")
+
+    trade_updates.stop()
+    save_indicator_state()
+    close_notifier()
+    journal.close()
+    log("🛑 Bot daemon stopped.")
+    log_sink.close()
+
+# --- Streaming Mode ---
+# Bars arrive over the Alpaca WebSocket and each completed bar is evaluated as
+# soon as it closes. Pass a ws:// URL of replay_server.py to run offline.
+def run_stream(stream_url=None, record_path=None):
+    from bar_store import get_bars_many
+    from ring_buffer import RingStore
+    from strategies import STRATEGIES, active_strategies
+    from stream_feed import StreamingFeed, bars_at
+
+    refresh_settings()
+    universe = settings.get("symbols", ["AAPL", "MSFT", "GOOGL"])
+    # One feed carries one bar interval; strategies on other intervals are
+    # left to the daemon.
+    names = active_strategies(settings)
+    period, interval = STRATEGIES[names[0]](settings).bars()
+    strategies = [n for n in names if STRATEGIES[n](settings).bars()[1] == interval]
+    for name in set(names) - set(strategies):
+        log(f"Skipping {name} in stream mode: it trades {STRATEGIES[name](settings).bars()[1]} bars.", level="WARNING")
+    symbols = []
+    for name in strategies:
+        symbols += [s for s in STRATEGIES[name](settings).symbols(universe) if s not in symbols]
+    interval_minutes = 60 if interval == "1h" else int(interval.rstrip("m"))
+
+    def on_bar(symbol, window):
+        ts = window.last_ts()
+        journal.bar(symbol, ts, window.data[:, -1])
+        with METRICS.cycle():
+            orders = get_engine().evaluate(strategies, settings, [symbol], bars_at(feed.rings, symbols, symbol, window),
+                                           trigger=symbol)
+            journal.signals(orders, trigger=symbol, ts=ts)
+            execute_trades(orders)
+        save_indicator_state()
+        METRICS.save()
+
+    # Each symbol keeps only the bars its longest indicator window needs (with
+    # room to reseed), not the whole downloaded history. Buffers the journal
+    # refills from the last session with the same settings skip the download
+    # if no bar has closed since; otherwise the bars since are downloaded and
+    # laid on top, and a buffer the download doesn't reach back to is dropped.
+    capacity = 2 * max(STRATEGIES[name](settings).lookback() for name in strategies) + 1
+    interval_ns = interval_minutes * 60 * 10**9
+    rings = RingStore(capacity)
+    restore_book(rings=rings, symbols=symbols,
+                 session={"settings": settings, "strategies": strategies, "capacity": capacity})
+    now = time.time_ns()
+    full = [s for s in symbols if s in rings.rings and len(rings.rings[s]) == capacity]
+    fresh = [s for s in full if now < rings.last_ts(s) + 2 * interval_ns]
+    missing = [s for s in symbols if s not in fresh]
+    history = get_bars_many(missing, period, interval) if missing else {}
+    for s in missing:
+        frame = history.get(s)
+        if s not in full or frame is None or frame.empty or frame.index[0].value > rings.last_ts(s):
+            rings.rings.pop(s, None)
+    topped_up = [s for s in full if s in missing and s in rings.rings]
+    feed = StreamingFeed(symbols, interval_minutes, on_bar, history=history, capacity=capacity,
+                         record_path=record_path, rings=rings)
+    journal.session(settings, strategies, symbols, capacity)
+    journal.seed_bars(feed.rings, symbols)
+    signal.signal(signal.SIGTERM, lambda *_: feed.stop())
+    log(f"📡 Streaming {interval} bars for {', '.join(symbols)}"
+        f" ({len(fresh)} restored from the journal, {len(topped_up)} topped up).")
     try:
-        api.submit_order(symbol=symbol, qty=1, side=action, type="market", time_in_force="gtc")
-        msg = f"📈 {symbol.upper()} {action.upper()} executed."
-        send_telegram(msg)
-        sound_alert(f"{symbol} {action} executed")
-        log(msg)
-    except Exception as e:
-        log(f"Trade error for {symbol}: {e}")
-
-if strategy == "ma_rsi_combo":
-    for symbol in ["AAPL", "MSFT", "GOOGL"]:
-        signal = ma_rsi_combo(symbol)
-        log(f"{symbol} signal: {signal}")
-        if signal:
-            execute_trade(symbol, signal)
-
-elif strategy == "bollinger_rsi":
-    for symbol in ["AAPL", "MSFT", "GOOGL"]:
-        signal = bollinger_rsi(symbol)
-        log(f"{symbol} signal: {signal}")
-        if signal:
-            execute_trade(symbol, signal)
-
-elif strategy == "pairs_zscore":
-    result = pairs_zscore()
-    if result == "exit":
-        log("Z-score exited. No action.")
-    elif result:
-        sym1, act1, sym2, act2 = result
-        log(f"Pairs signal: {sym1}-{act1}, {sym2}-{act2}")
-        execute_trade(sym1, act1)
-        execute_trade(sym2, act2)
-
-log("🤖 Bot run complete.")
+        # Order events come from the live trading stream; a replay run keeps
+        # the book current from submit responses and REST reconciliation.
+        feed.run(APCA_API_KEY_ID, APCA_API_SECRET_KEY, APCA_API_BASE_URL, data_stream_url=stream_url,
+                 on_trade_update=None if stream_url else on_trade_update)
+    except KeyboardInterrupt:
+        feed.stop()
+    save_indicator_state()
+    close_notifier()
+    journal.close()
+    log("🛑 Bot stream stopped.")
+    log_sink.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alpaca trading bot")
+    parser.add_argument("--daemon", action="store_true", help="stay running and trade every bar close")
+    parser.add_argument("--interval", type=int, default=15, help="bar interval in minutes for --daemon")
+    parser.add_argument("--stream", action="store_true", help="trade on bars from the Alpaca WebSocket")
+    parser.add_argument("--stream-url", default=None, help="data stream URL, e.g. ws://localhost:8765 for replay_server.py")
+    parser.add_argument("--record", default=None, help="append streamed 1m bars to this CSV for later replay")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus /metrics and /metrics.json on this port (daemon/stream)")
+    args = parser.parse_args()
+
+    if args.metrics_port and (args.stream or args.daemon):
+        serve_metrics(METRICS, args.metrics_port)
+
+    if args.stream:
+        run_stream(args.stream_url, args.record)
+    elif args.daemon:
+        run_daemon(args.interval)
+    elif not is_market_open():
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Market is closed. Bot will not run.")
+    else:
+        run_cycle()
+        close_notifier()
+        journal.close()
+        log_sink.close()
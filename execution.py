@@ -0,0 +1,150 @@
+# execution.py
+# Concurrent order submission and a background notification queue for the bot.
+# Orders for a cycle are sent together on worker threads driven by asyncio, so
+# both legs of a pair leave at (nearly) the same moment. Telegram, sound
+# alerts and trade logging run on a separate thread with timeouts and
+# retries, so a slow endpoint never delays an order.
+
+import asyncio
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import requests
+
+from metrics import span
+
+TELEGRAM_TIMEOUT = 5
+TELEGRAM_RETRIES = 3
+SOUND_TIMEOUT = 10
+
+
+def _print_log(message, level="INFO", symbol=None):
+    print(f"[{level}] [{symbol or '-'}] {message}")
+
+
+# --- Notifications ---
+class Notifier:
+    def __init__(self, telegram_token=None, telegram_chat_id=None, log=_print_log,
+                 timeout=TELEGRAM_TIMEOUT, retries=TELEGRAM_RETRIES, backoff=1.0):
+        self.telegram_token = telegram_token
+        self.telegram_chat_id = telegram_chat_id
+        self.log = log
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.has_say = shutil.which("say") is not None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name="notifier", daemon=True)
+        self._thread.start()
+
+    def notify(self, message, sound=None, symbol=None):
+        # Queue a log line, Telegram message and optional spoken alert.
+        self._queue.put((message, sound, symbol))
+
+    def close(self, timeout=30):
+        # Flush whatever is queued, then stop the worker.
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            message, sound, symbol = item
+            try:
+                with span("notify"):
+                    self.log(message, symbol=symbol)
+                    self.send_telegram(message)
+                    if sound:
+                        self.sound_alert(sound)
+            except Exception as e:
+                print(f"Notification failed: {e}")
+
+    def send_telegram(self, message):
+        if not self.telegram_token or not self.telegram_chat_id:
+            return False
+        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
+        payload = {"chat_id": self.telegram_chat_id, "text": message}
+        for attempt in range(1, self.retries + 1):
+            delay = self.backoff * 2 ** (attempt - 1)
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code == 200:
+                    return True
+                if response.status_code == 429:
+                    delay = response.json().get("parameters", {}).get("retry_after", delay)
+                print(f"Telegram error (attempt {attempt}/{self.retries}):", response.text)
+            except Exception as e:
+                print(f"Telegram send failed (attempt {attempt}/{self.retries}): {e}")
+            if attempt < self.retries:
+                time.sleep(delay)
+        return False
+
+    def sound_alert(self, message="Trade executed"):
+        if not self.has_say:
+            return
+        try:
+            subprocess.run(["say", message], timeout=SOUND_TIMEOUT, check=False)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+# --- Orders ---
+def _submit(api, symbol, side, qty):
+    return api.submit_order(symbol=symbol, qty=qty, side=side, type="market", time_in_force="gtc")
+
+
+async def submit_orders(api, orders, qty=1):
+    # The REST client is blocking, so each order gets its own thread and they
+    # are all in flight at once.
+    tasks = [asyncio.to_thread(_submit, api, symbol, side, qty) for symbol, side in orders]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _submit_pooled(pool, api, orders, qty):
+    # Same as submit_orders, on a caller-owned (bounded) executor.
+    futures = [pool.submit(_submit, api, symbol, side, qty) for symbol, side in orders]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def execute_orders(api, orders, notifier, log=_print_log, qty=1, book=None, pool=None):
+    # Submit [(symbol, side), ...] concurrently; returns {symbol: order or exception}.
+    # With an OrderBook, orders it refuses (already positioned, or one
+    # already working) are logged and skipped. With `pool` (an Executor),
+    # orders are sent on its threads instead of one thread per order.
+    if book is not None:
+        allowed = []
+        for symbol, side in orders:
+            ok, reason = book.allow(symbol, side)
+            if ok:
+                allowed.append((symbol, side))
+            else:
+                log(f"Skipping {side} {symbol}: {reason}.", symbol=symbol)
+        orders = allowed
+    if not orders:
+        return {}
+    with span("orders"):
+        if pool is None:
+            results = asyncio.run(submit_orders(api, orders, qty))
+        else:
+            results = _submit_pooled(pool, api, orders, qty)
+    for (symbol, side), result in zip(orders, results):
+        if isinstance(result, Exception):
+            log(f"Trade error for {symbol}: {result}", level="ERROR", symbol=symbol)
+        else:
+            if book is not None:
+                book.on_submitted(result)
+            notifier.notify(f"📈 {symbol.upper()} {side.upper()} executed.",
+                            sound=f"{symbol} {side} executed", symbol=symbol)
+    return {symbol: result for (symbol, _), result in zip(orders, results)}
@@ -0,0 +1,152 @@
+# fills_ledger.py
+# Local SQLite ledger of account fills for the Performance tab. Each sync pulls
+# only activities newer than the last stored id, page by page, and folds them
+# into per-symbol FIFO lots and realized P/L, so reading the tab costs one
+# small indexed query no matter how long the account history is.
+
+import sqlite3
+from contextlib import closing
+
+PAGE_SIZE = 100
+# Fractional-share quantities below this are treated as fully matched.
+QTY_EPSILON = 1e-9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    id TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    qty REAL NOT NULL,
+    price REAL NOT NULL,
+    transaction_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fills_symbol_time ON fills (symbol, transaction_time);
+CREATE INDEX IF NOT EXISTS fills_time ON fills (transaction_time);
+
+-- Open FIFO lots; qty > 0 is long, qty < 0 is short.
+CREATE TABLE IF NOT EXISTS lots (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    qty REAL NOT NULL,
+    price REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lots_symbol ON lots (symbol, seq);
+
+CREATE TABLE IF NOT EXISTS pnl (
+    symbol TEXT PRIMARY KEY,
+    realized_pl REAL NOT NULL DEFAULT 0,
+    fills INTEGER NOT NULL DEFAULT 0,
+    last_fill_time TEXT
+);
+"""
+
+
+class FillsLedger:
+    def __init__(self, path="fills.db"):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # --- Sync ---
+    def sync(self, api):
+        # Pull fills newer than the last stored one; returns how many were added.
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so concurrent dashboard
+            # sessions sync one at a time instead of double-counting fills.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id FROM fills ORDER BY id DESC LIMIT 1").fetchone()
+            page_token = row[0] if row else None
+            added = 0
+            # AlpacaClient's TTL cache is bypassed; a plain REST client works too.
+            get_activities = getattr(api, "get_activities_uncached", api.get_activities)
+            while True:
+                page = get_activities(activity_types="FILL", direction="asc",
+                                      page_size=PAGE_SIZE, page_token=page_token)
+                for activity in page:
+                    if self._apply(conn, activity):
+                        added += 1
+                if len(page) < PAGE_SIZE:
+                    break
+                page_token = page[-1].id
+            conn.commit()
+            return added
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _apply(self, conn, activity):
+        symbol = getattr(activity, "symbol", None)
+        if symbol is None or not hasattr(activity, "price"):
+            return False
+        qty = float(activity.qty)
+        price = float(activity.price)
+        side = activity.side
+        when = str(activity.transaction_time)
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO fills (id, symbol, side, qty, price, transaction_time) VALUES (?, ?, ?, ?, ?, ?)",
+            (activity.id, symbol, side, qty, price, when),
+        )
+        if cur.rowcount == 0:
+            return False
+        realized = self._match_lots(conn, symbol, qty if side == "buy" else -qty, price)
+        conn.execute(
+            """INSERT INTO pnl (symbol, realized_pl, fills, last_fill_time) VALUES (?, ?, 1, ?)
+               ON CONFLICT(symbol) DO UPDATE SET realized_pl = realized_pl + excluded.realized_pl,
+                   fills = fills + 1, last_fill_time = excluded.last_fill_time""",
+            (symbol, realized, when),
+        )
+        return True
+
+    def _match_lots(self, conn, symbol, signed_qty, price):
+        # FIFO: a fill first closes opposite-side lots oldest first, and any
+        # remainder opens a new lot. Returns the realized P/L of the fill.
+        realized = 0.0
+        remaining = signed_qty
+        opposite = "qty < 0" if signed_qty > 0 else "qty > 0"
+        lots = conn.execute(
+            f"SELECT seq, qty, price FROM lots WHERE symbol = ? AND {opposite} ORDER BY seq", (symbol,)
+        ).fetchall()
+        for seq, lot_qty, lot_price in lots:
+            if abs(remaining) < QTY_EPSILON:
+                break
+            matched = min(abs(remaining), abs(lot_qty))
+            # Closing a long realizes (exit - entry); closing a short the reverse.
+            direction = 1 if lot_qty > 0 else -1
+            realized += (price - lot_price) * matched * direction
+            left = abs(lot_qty) - matched
+            if left < QTY_EPSILON:
+                conn.execute("DELETE FROM lots WHERE seq = ?", (seq,))
+            else:
+                conn.execute("UPDATE lots SET qty = ? WHERE seq = ?", (left * direction, seq))
+            remaining -= matched if remaining > 0 else -matched
+        if abs(remaining) >= QTY_EPSILON:
+            conn.execute("INSERT INTO lots (symbol, qty, price) VALUES (?, ?, ?)", (symbol, remaining, price))
+        return realized
+
+    # --- Queries ---
+    def realized_pnl(self):
+        # [{"Symbol", "Realized P/L", "Open Qty", "Fills"}, ...] from the summary tables.
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """SELECT p.symbol, p.realized_pl, COALESCE(SUM(l.qty), 0), p.fills
+                   FROM pnl p LEFT JOIN lots l ON l.symbol = p.symbol
+                   GROUP BY p.symbol ORDER BY p.symbol"""
+            ).fetchall()
+        return [
+            {"Symbol": s, "Realized P/L": round(pl, 2), "Open Qty": qty, "Fills": n}
+            for s, pl, qty, n in rows
+        ]
+
+    def recent_fills(self, limit=50):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT symbol, side, qty, price, transaction_time FROM fills ORDER BY transaction_time DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [{"Symbol": s, "Side": side, "Qty": q, "Price": p, "Time": t} for s, side, q, p, t in rows]
@@ -0,0 +1,147 @@
+# import_profile.py
+# Cold-start import profile for the bot's entry points. Each target runs in a
+# fresh interpreter under `python -X importtime`; the report records the wall
+# time, the cumulative import time of each top-level module the target pulls
+# in (interpreter start-up excluded) and which heavy third-party packages got
+# loaded. import_baseline.json is the checked-in reference, so a module-level
+# import that slips back onto the closed-market path is caught.
+#
+#   python import_profile.py                                   # writes import_profile.json
+#   python import_profile.py --baseline import_baseline.json   # exit 1 on regression
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+HEAVY = ["pandas", "numpy", "yfinance", "alpaca_trade_api", "requests", "pytz", "streamlit"]
+DEFAULT_REPEATS = 5
+DEFAULT_TOLERANCE = 0.5
+# Import times of a few ms jitter by more than any ratio; smaller changes
+# than this are never reported.
+MIN_SLACK_SECONDS = 0.02
+
+# name -> (code run with -c, heavy packages it must not load)
+TARGETS = {
+    "market_gate": ("import bot_engine; bot_engine.is_market_open()", HEAVY),
+    "strategy_engine": ("import bot_engine; bot_engine.get_engine()", []),
+}
+
+
+# --- Profiling ---
+def parse_importtime(stderr):
+    """Return [(module, self_s, cumulative_s, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return rows
+
+
+def _run(code, cwd):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                          capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return seconds, parse_importtime(proc.stderr)
+
+
+def profile(code, forbidden=(), repeats=DEFAULT_REPEATS, cwd=None, top=10):
+    # The fastest of `repeats` runs is kept; the first run also warms the
+    # bytecode cache.
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    startup = {name for name, *_ in _run("pass", cwd)[1]}
+    runs = [_run(code, cwd) for _ in range(repeats + 1)][1:]
+    seconds, rows = min(runs, key=lambda run: run[0])
+    own = [(name, cumulative) for name, _, cumulative, depth in rows if depth == 0 and name not in startup]
+    packages = {name.split(".")[0] for name, *_ in rows}
+    return {
+        "seconds": seconds,
+        "import_seconds": sum(cumulative for _, cumulative in own),
+        "modules": len(rows),
+        "heavy": sorted(p for p in HEAVY if p in packages),
+        "forbidden": sorted(p for p in forbidden if p in packages),
+        "top": [{"module": name, "seconds": cumulative}
+                for name, cumulative in sorted(own, key=lambda r: -r[1])[:top]],
+    }
+
+
+def run_profiles(targets=None, repeats=DEFAULT_REPEATS):
+    results = []
+    for name in targets or TARGETS:
+        code, forbidden = TARGETS[name]
+        result = {"target": name, "code": code}
+        result.update(profile(code, forbidden, repeats))
+        results.append(result)
+        print(f"⏱️ {name:<16} {result['import_seconds'] * 1000:8.1f} ms imports  "
+              f"{result['seconds'] * 1000:8.1f} ms wall  heavy: {', '.join(result['heavy']) or '-'}")
+    return results
+
+
+def environment():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+# --- Baseline Comparison ---
+def compare(results, baseline=None, tolerance=DEFAULT_TOLERANCE):
+    """Return regressions: forbidden heavy imports, and import time above the
+    baseline by more than `tolerance` (and MIN_SLACK_SECONDS)."""
+    reference = {r["target"]: r for r in (baseline or {}).get("results", [])}
+    regressions = []
+    for row in results:
+        if row["forbidden"]:
+            regressions.append({"target": row["target"], "metric": "forbidden", "modules": row["forbidden"]})
+        base = reference.get(row["target"])
+        if base and row["import_seconds"] > max(base["import_seconds"] * (1 + tolerance),
+                                                base["import_seconds"] + MIN_SLACK_SECONDS):
+            regressions.append({"target": row["target"], "metric": "import_seconds",
+                                "baseline": base["import_seconds"], "current": row["import_seconds"],
+                                "ratio": row["import_seconds"] / base["import_seconds"]})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start import profile of the bot entry points")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), help="default: all")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--out", default="import_profile.json")
+    parser.add_argument("--baseline", help="report to compare against, e.g. import_baseline.json")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown, e.g. 0.5 = 50%%")
+    args = parser.parse_args()
+
+    results = run_profiles(args.targets, args.repeats)
+    report = {"environment": environment(), "repeats": args.repeats, "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report written to {args.out}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print("✅ No import regressions" + (f" against {args.baseline}" if args.baseline else ""))
+    else:
+        print(f"❌ {len(regressions)} import regression(s):")
+        for r in regressions:
+            if r["metric"] == "forbidden":
+                print(f"   {r['target']}: loads {', '.join(r['modules'])}")
+            else:
+                print(f"   {r['target']}: imports {r['baseline'] * 1000:.1f} -> {r['current'] * 1000:.1f} ms "
+                      f"({r['ratio']:.2f}x)")
+        sys.exit(1)
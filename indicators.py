@@ -0,0 +1,302 @@
+# indicators.py
+# Streaming indicators with O(1) per-bar updates. Each indicator keeps just
+# its window and running sums, can be seeded from history once and then fed
+# one bar at a time. `peek()` evaluates a (possibly still forming) bar without
+# committing it. IndicatorStore persists the state between bot runs.
+
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+NAN = float("nan")
+
+# Running sums are rebuilt from the window this often to stop float drift.
+RESUM_EVERY = 1000
+
+
+# --- Rolling Mean ---
+class RollingMean:
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.updates = 0
+
+    def _next(self, x):
+        if len(self.values) == self.window:
+            return self.total - self.values[0] + x, self.window
+        return self.total + x, len(self.values) + 1
+
+    def peek(self, x):
+        total, count = self._next(x)
+        return total / count if count == self.window else NAN
+
+    def update(self, x):
+        self.total, count = self._next(x)
+        if len(self.values) == self.window:
+            self.values.popleft()
+        self.values.append(x)
+        self.updates += 1
+        if self.updates % RESUM_EVERY == 0:
+            self.total = math.fsum(self.values)
+        return self.value
+
+    @property
+    def value(self):
+        return self.total / self.window if len(self.values) == self.window else NAN
+
+    def to_dict(self):
+        return {"window": self.window, "values": list(self.values), "total": self.total, "updates": self.updates}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d["window"])
+        obj.values = deque(d["values"])
+        obj.total = d["total"]
+        obj.updates = d["updates"]
+        return obj
+
+
+# --- Rolling Std (sample, ddof=1 like pandas) ---
+class RollingStd:
+    # Rolling Welford: keeps the window mean and the sum of squared deviations,
+    # which stays accurate where a raw sum-of-squares would cancel out.
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _next(self, x):
+        n = len(self.values)
+        if n == self.window:
+            y = self.values[0]
+            mean = self.mean + (x - y) / n
+            m2 = self.m2 + (x - y) * (x - mean + y - self.mean)
+        else:
+            mean = self.mean + (x - self.mean) / (n + 1)
+            m2 = self.m2 + (x - self.mean) * (x - mean)
+        return mean, max(m2, 0.0)
+
+    def _std(self, m2, count):
+        return math.sqrt(m2 / (self.window - 1)) if count == self.window and self.window > 1 else NAN
+
+    def peek(self, x):
+        mean, m2 = self._next(x)
+        count = min(len(self.values) + 1, self.window)
+        return (mean if count == self.window else NAN), self._std(m2, count)
+
+    def update(self, x):
+        self.mean, self.m2 = self._next(x)
+        if len(self.values) == self.window:
+            self.values.popleft()
+        self.values.append(x)
+        return self.value
+
+    @property
+    def value(self):
+        # (mean, std) of the current window
+        full = len(self.values) == self.window
+        return (self.mean if full else NAN), self._std(self.m2, len(self.values))
+
+    def to_dict(self):
+        return {"window": self.window, "values": list(self.values), "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d["window"])
+        obj.values = deque(d["values"])
+        obj.mean = d["mean"]
+        obj.m2 = d["m2"]
+        return obj
+
+
+# --- RSI (simple rolling average of gains / losses, as in bot_engine.py) ---
+def _rsi(gain, loss):
+    if math.isnan(gain) or math.isnan(loss):
+        return NAN
+    if loss == 0:
+        return 100.0 if gain > 0 else NAN
+    return 100 - (100 / (1 + gain / loss))
+
+
+class RollingRSI:
+    def __init__(self, period):
+        self.period = period
+        self.prev_close = None
+        self.gain = RollingMean(period)
+        self.loss = RollingMean(period)
+
+    def peek(self, close):
+        if self.prev_close is None:
+            return NAN
+        delta = close - self.prev_close
+        return _rsi(self.gain.peek(max(delta, 0.0)), self.loss.peek(max(-delta, 0.0)))
+
+    def update(self, close):
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            self.gain.update(max(delta, 0.0))
+            self.loss.update(max(-delta, 0.0))
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self):
+        return _rsi(self.gain.value, self.loss.value)
+
+    def to_dict(self):
+        return {"period": self.period, "prev_close": self.prev_close,
+                "gain": self.gain.to_dict(), "loss": self.loss.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d["period"])
+        obj.prev_close = d["prev_close"]
+        obj.gain = RollingMean.from_dict(d["gain"])
+        obj.loss = RollingMean.from_dict(d["loss"])
+        return obj
+
+
+# --- Spread Z-Score ---
+class ZScore:
+    def __init__(self, window):
+        self.stats = RollingStd(window)
+
+    @staticmethod
+    def _z(x, mean, std):
+        return (x - mean) / std if std and not math.isnan(std) else NAN
+
+    def peek(self, x):
+        return self._z(x, *self.stats.peek(x))
+
+    def update(self, x):
+        self.stats.update(x)
+        return self._z(x, *self.stats.value)
+
+    def to_dict(self):
+        return {"stats": self.stats.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        obj.stats = RollingStd.from_dict(d["stats"])
+        return obj
+
+
+# --- Strategy States ---
+class MaRsiState:
+    def __init__(self, fast_ma, slow_ma, rsi_period):
+        self.fast = RollingMean(fast_ma)
+        self.slow = RollingMean(slow_ma)
+        self.rsi = RollingRSI(rsi_period)
+
+    def update(self, close):
+        self.fast.update(close)
+        self.slow.update(close)
+        self.rsi.update(close)
+
+    def to_dict(self):
+        return {"fast": self.fast.to_dict(), "slow": self.slow.to_dict(), "rsi": self.rsi.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        obj.fast = RollingMean.from_dict(d["fast"])
+        obj.slow = RollingMean.from_dict(d["slow"])
+        obj.rsi = RollingRSI.from_dict(d["rsi"])
+        return obj
+
+
+class BollingerRsiState:
+    def __init__(self, window, rsi_period):
+        self.band = RollingStd(window)
+        self.rsi = RollingRSI(rsi_period)
+
+    def update(self, close):
+        self.band.update(close)
+        self.rsi.update(close)
+
+    def to_dict(self):
+        return {"band": self.band.to_dict(), "rsi": self.rsi.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        obj.band = RollingStd.from_dict(d["band"])
+        obj.rsi = RollingRSI.from_dict(d["rsi"])
+        return obj
+
+
+class PairsState:
+    def __init__(self, lookback):
+        self.zscore = ZScore(lookback)
+
+    def update(self, spread):
+        self.zscore.update(spread)
+
+    def to_dict(self):
+        return {"zscore": self.zscore.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        obj.zscore = ZScore.from_dict(d["zscore"])
+        return obj
+
+
+# --- Persistence ---
+class IndicatorStore:
+    # Maps a key such as "ma_rsi_combo:AAPL" to a strategy state, the params it
+    # was built with and the timestamp of the last bar committed into it.
+    def __init__(self, path="indicator_state.json"):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read {path}, reseeding indicators: {e}")
+
+    def sync(self, key, state_cls, params, series):
+        """Bring the state for `key` up to the bar before the last one in `series`.
+
+        The final bar may still be forming, so it is left for the caller to
+        `peek()` at. The state is reseeded from `series` when it is new, was
+        built with different params, or has fallen behind the series window.
+        `series` is a pandas Series or a ring_buffer.SeriesView.
+        """
+        if hasattr(series, "index"):
+            ts, values = series.index.as_unit("ns").asi8, series.to_numpy(dtype=float)
+        else:
+            ts, values = series.ts, series.values
+        params = list(params)
+        entry = self.entries.get(key)
+        state = None
+        if entry and entry["params"] == params:
+            last_ns = entry["last_ns"] if "last_ns" in entry else pd.Timestamp(entry["last_ts"]).value
+            k = int(np.searchsorted(ts, last_ns))
+            if k < len(ts) and ts[k] == last_ns:
+                state = state_cls.from_dict(entry["state"])
+                start = k + 1
+        if state is None:
+            state = state_cls(*params)
+            start = 0
+
+        stop = len(values) - 1
+        for value in values[start:stop].tolist():
+            state.update(value)
+        if stop > start:
+            self.entries[key] = {"params": params, "last_ns": int(ts[stop - 1]), "state": state.to_dict()}
+        return state
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
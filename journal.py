@@ -0,0 +1,307 @@
+# journal.py
+# Append-only JSONL event journal for the bot: the bars it received, the
+# signals it emitted, the orders it submitted, trade updates (fills) and
+# order-book snapshots taken whenever the book is seeded from REST. Replaying
+# it rebuilds position and bar-buffer state at startup without querying
+# Alpaca or yfinance, and re-runs a recorded stream session through the
+# strategies, as fast as possible or at N x real time, to check that they
+# still emit the same signals.
+#
+#   python journal.py info journal.jsonl
+#   python journal.py replay journal.jsonl               # exit 1 if signals differ
+#   python journal.py replay journal.jsonl --speed 60    # 60x real time
+#
+# One event per line, "kind" first:
+#   {"kind":"session","time":...,"settings":{...},"strategies":[...],"symbols":[...],"capacity":41}
+#   {"kind":"bar","time":...,"symbol":"AAPL","ts":<ns UTC>,"values":[o,h,l,c,v],"seed":false}
+#   {"kind":"signals","time":...,"trigger":"AAPL","ts":<ns UTC>,"orders":[["AAPL","buy"]]}
+#   {"kind":"order","time":...,"symbol":"AAPL","side":"buy","order":{...}} / ...,"error":"..."}
+#   {"kind":"trade_update","time":...,"event":"fill","order":{...},"position_qty":"3"}
+#   {"kind":"book","time":...,"positions":{...},"orders":{...}}
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+JOURNAL_PATH = "journal.jsonl"
+FLUSH_INTERVAL = 1.0
+BLOCK_SIZE = 64 * 1024
+# Written through at once: losing one of these would desync the position state.
+DURABLE_KINDS = {"order", "trade_update", "book"}
+ORDER_FIELDS = ["id", "symbol", "side", "qty", "filled_qty"]
+
+
+def _field(obj, name):
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _order_dict(order):
+    # The order fields the book needs, from a REST/stream entity or a dict.
+    values = {name: _field(order, name) for name in ORDER_FIELDS}
+    return {name: value if value is None or isinstance(value, (int, float)) else str(value)
+            for name, value in values.items()}
+
+
+# --- Writing ---
+class Journal:
+    def __init__(self, path=JOURNAL_PATH, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.file = None  # opened on the first event
+
+    def record(self, kind, **fields):
+        line = json.dumps({"kind": kind, "time": round(time.time(), 3), **fields}, separators=(",", ":"))
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, "a", encoding="utf-8", buffering=64 * 1024)
+                self.last_flush = time.monotonic()
+            self.file.write(line + "\n")
+            now = time.monotonic()
+            if kind in DURABLE_KINDS or now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                if kind in DURABLE_KINDS:
+                    os.fsync(self.file.fileno())
+                self.last_flush = now
+
+    def session(self, settings, strategies, symbols, capacity):
+        self.record("session", settings=settings, strategies=list(strategies), symbols=list(symbols),
+                    capacity=capacity)
+
+    def bar(self, symbol, ts, values, seed=False):
+        self.record("bar", symbol=symbol, ts=int(ts), values=[float(v) for v in values], seed=seed)
+
+    def seed_bars(self, rings, symbols):
+        # The starting contents of the bar buffers, so a replay starts from
+        # exactly the history the live session had.
+        for symbol in symbols:
+            window = rings.window(symbol)
+            for k in range(len(window)):
+                self.bar(symbol, window.ts[k], window.data[:, k], seed=True)
+
+    def signals(self, orders, trigger=None, ts=None):
+        self.record("signals", trigger=trigger, ts=ts, orders=[list(o) for o in orders])
+
+    def orders(self, orders, results):
+        # One event per submitted order: the broker's order, or the error.
+        for symbol, side in orders:
+            if symbol not in results:
+                continue
+            result = results[symbol]
+            if isinstance(result, Exception):
+                self.record("order", symbol=symbol, side=side, error=str(result))
+            else:
+                self.record("order", symbol=symbol, side=side, order=_order_dict(result))
+
+    def trade_update(self, update):
+        position_qty = _field(update, "position_qty")
+        self.record("trade_update", event=_field(update, "event"), order=_order_dict(_field(update, "order") or {}),
+                    position_qty=None if position_qty is None else str(position_qty))
+
+    def book(self, book):
+        self.record("book", **book.snapshot())
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+# --- Reading ---
+def _events(path, start=0):
+    # (line number, event) from line `start` on; a torn last line (crash
+    # mid-write) is skipped.
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if n < start:
+                continue
+            try:
+                yield n, json.loads(line)
+            except ValueError:
+                continue
+
+
+def read(path=JOURNAL_PATH, start=0):
+    for _, event in _events(path, start):
+        yield event
+
+
+def _last_index(lines, prefix):
+    # Index of the last line starting with `prefix`, scanning from the end.
+    for n in range(len(lines) - 1, -1, -1):
+        if lines[n].startswith(prefix):
+            return n
+    return None
+
+
+def _tail(path, prefixes):
+    """Read backward from the end until the last line starting with each of
+    `prefixes` is in hand; returns (lines, [index of each, or None]).
+
+    The block read doubles each step, so the tail is read about once however
+    far back the markers are, and the rest of the file not at all.
+    """
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        data, block = b"", BLOCK_SIZE
+        while True:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+            block *= 2
+            # The first line may be cut off unless the start of the file is in.
+            lines = data.splitlines()[0 if pos == 0 else 1:]
+            found = [_last_index(lines, prefix) for prefix in prefixes]
+            if pos == 0 or None not in found:
+                return lines, found
+
+
+def recover(path=JOURNAL_PATH, book=None, rings=None, symbols=None, session=None):
+    """Rebuild state from the journal; returns {kind: events applied}, or
+    None if there is nothing to recover.
+
+    `book` (an OrderBook) is restored from the last snapshot plus the order
+    and trade events after it. `rings` (a RingStore) gets the bars of the
+    last session for `symbols` (all if None), provided that session recorded
+    the same values as `session` (e.g. {"settings", "strategies",
+    "capacity"}); bars of a differently configured session are left out.
+    Only the tail after the last snapshot / session is read and parsed,
+    picked by each line's "kind" prefix.
+    """
+    if not os.path.exists(path) or (book is None and rings is None):
+        return None
+    markers = [b'{"kind":"book"'] * (book is not None) + [b'{"kind":"session"'] * (rings is not None)
+    lines, found = _tail(path, markers)
+    book_at = found.pop(0) if book is not None else None
+    session_at = found.pop(0) if rings is not None else None
+    if session_at is not None and session:
+        try:
+            recorded = json.loads(lines[session_at])
+        except ValueError:
+            recorded = {}
+        if any(recorded.get(k) != v for k, v in session.items()):
+            session_at = None
+    starts = [n for n in (book_at, session_at) if n is not None]
+    if not starts:
+        return None
+
+    book_kinds = (b'{"kind":"book"', b'{"kind":"order"', b'{"kind":"trade_update"')
+    counts = {}
+    wanted = set(symbols) if symbols is not None else None
+    for n in range(min(starts), len(lines)):
+        line = lines[n]
+        use_book = book_at is not None and n >= book_at and line.startswith(book_kinds)
+        use_bar = session_at is not None and n > session_at and line.startswith(b'{"kind":"bar"')
+        if not (use_book or use_bar):
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue  # torn last line
+        kind = event["kind"]
+        if kind == "book":
+            book.restore(event)
+        elif kind == "order":
+            if "order" in event:
+                book.on_submitted(event["order"])
+        elif kind == "trade_update":
+            book.on_trade_update(event)
+        elif wanted is None or event["symbol"] in wanted:
+            rings.append(event["symbol"], event["ts"], event["values"])
+        counts[kind] = counts.get(kind, 0) + 1
+    return counts
+
+
+# --- Offline Replay ---
+def replay(path=JOURNAL_PATH, speed=None, log=None):
+    """Re-run every recorded stream session through the strategies.
+
+    Each live bar is evaluated exactly as bot_engine.run_stream does, with a
+    fresh indicator state, and the orders are compared with the journaled
+    signals. `speed` replays at that multiple of real time (bar timestamps);
+    None runs as fast as possible. Returns a summary with the mismatches.
+    """
+    import tempfile
+
+    from indicators import IndicatorStore
+    from ring_buffer import RingStore
+    from strategies import StrategyEngine
+    from stream_feed import bars_at
+
+    log = log or (lambda message, level="INFO", symbol=None: None)
+    produced, recorded = {}, {}
+    bars = sessions = 0
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        engine = session = rings = None
+        last_ts = None
+        for event in read(path):
+            kind = event["kind"]
+            if kind == "session":
+                session = event
+                sessions += 1
+                rings = RingStore(event["capacity"])
+                engine = StrategyEngine(IndicatorStore(os.path.join(directory, f"state{sessions}.json")), log=log)
+                last_ts = None
+            elif kind == "bar" and session is not None:
+                if not rings.append(event["symbol"], event["ts"], event["values"]) or event["seed"]:
+                    continue
+                if speed and last_ts is not None and event["ts"] > last_ts:
+                    time.sleep((event["ts"] - last_ts) / 1e9 / speed)
+                last_ts = event["ts"]
+                symbol = event["symbol"]
+                window = rings.window(symbol)
+                orders = engine.evaluate(session["strategies"], session["settings"], [symbol],
+                                         bars_at(rings, session["symbols"], symbol, window), trigger=symbol)
+                produced[(sessions, symbol, event["ts"])] = [list(o) for o in orders]
+                bars += 1
+            elif kind == "signals" and session is not None and event.get("trigger"):
+                recorded[(sessions, event["trigger"], event["ts"])] = event["orders"]
+    mismatches = [{"session": key[0], "symbol": key[1], "ts": key[2], "recorded": recorded.get(key),
+                   "replayed": produced.get(key)}
+                  for key in sorted(set(produced) | set(recorded)) if produced.get(key) != recorded.get(key)]
+    return {"sessions": sessions, "bars": bars, "signals": sum(1 for o in produced.values() if o),
+            "mismatches": mismatches, "seconds": time.perf_counter() - started}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bot event journal")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="count events by kind")
+    info.add_argument("path", nargs="?", default=JOURNAL_PATH)
+    rep = sub.add_parser("replay", help="re-run recorded stream sessions and compare signals")
+    rep.add_argument("path", nargs="?", default=JOURNAL_PATH)
+    rep.add_argument("--speed", type=float, default=None, help="multiple of real time (default: as fast as possible)")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        counts = {}
+        for event in read(args.path):
+            counts[event["kind"]] = counts.get(event["kind"], 0) + 1
+        for kind, n in sorted(counts.items()):
+            print(f"{kind:<14} {n:>10,}")
+    else:
+        result = replay(args.path, args.speed)
+        print(f"⏩ Replayed {result['bars']:,} bars from {result['sessions']} session(s) in "
+              f"{result['seconds']:.2f}s, {result['signals']} with orders.")
+        if not result["mismatches"]:
+            print("✅ Signals match the journal.")
+        else:
+            print(f"❌ {len(result['mismatches'])} bar(s) with different signals:")
+            for m in result["mismatches"][:20]:
+                print(f"   {m['symbol']} @ {m['ts']}: recorded {m['recorded']} -> replayed {m['replayed']}")
+            sys.exit(1)
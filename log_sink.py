@@ -0,0 +1,138 @@
+# log_sink.py
+# Structured bot log: one line per record carrying level and symbol fields,
+# written through a long-lived buffered handle with size-based rotation, and a
+# tail reader that seeks backward from the end so the dashboard never loads
+# the whole file.
+#
+#   [2026-01-02 10:15:00] [INFO] [AAPL] AAPL signal: buy
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+MAX_BYTES = 5 * 1024 * 1024
+BACKUPS = 3
+FLUSH_INTERVAL = 1.0
+BLOCK_SIZE = 8192
+
+LINE_RE = re.compile(r"^\[(?P<time>[^\]]+)\] (?:\[(?P<level>[A-Z]+)\] \[(?P<symbol>[^\]]*)\] )?(?P<message>.*)$")
+
+
+# --- Sink ---
+class LogSink:
+    def __init__(self, path="bot_log.txt", max_bytes=MAX_BYTES, backups=BACKUPS, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.file = None  # opened on the first record, so importing the bot writes nothing
+
+    def _open(self):
+        self.file = open(self.path, "a", encoding="utf-8", buffering=64 * 1024)
+        # Counted here rather than with file.tell(), which would flush the
+        # buffer on every record.
+        self.size = os.path.getsize(self.path)
+        self.last_flush = time.monotonic()
+
+    def write(self, message, level="INFO", symbol=None):
+        # Returns the formatted line (also what gets printed to stdout).
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[{timestamp}] [{level}] [{symbol or '-'}] {message}"
+        with self.lock:
+            if self.file is None:
+                self._open()
+            self.file.write(line + "\n")
+            self.size += len(line.encode("utf-8")) + 1
+            now = time.monotonic()
+            if level in ("WARNING", "ERROR") or now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = now
+            if self.size >= self.max_bytes:
+                self._rotate()
+        return line
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                self.last_flush = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+# --- Viewer ---
+def parse_line(line):
+    # {"time", "level", "symbol", "message"}; pre-structured lines read as INFO.
+    match = LINE_RE.match(line)
+    if not match:
+        return {"time": "", "level": "INFO", "symbol": "-", "message": line}
+    record = match.groupdict()
+    record["level"] = record["level"] or "INFO"
+    record["symbol"] = record["symbol"] or "-"
+    return record
+
+
+def tail(path, n=200, before=None, level=None, symbol=None):
+    """Return (lines, offset) for the last `n` matching lines before byte `before`.
+
+    `lines` are oldest first. Pass the returned offset as `before` to page to
+    older lines; it is 0 once the start of the file has been reached. Only as
+    much of the file as is needed to find `n` matches is read.
+    """
+    if not os.path.exists(path):
+        return [], 0
+    min_level = LEVELS.index(level) if level in LEVELS else 0
+    found = []
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END) if before is None else before
+        offset = position
+        carry = b""
+        while position > 0 and len(found) < n:
+            size = min(BLOCK_SIZE, position)
+            position -= size
+            f.seek(position)
+            pieces = (f.read(size) + carry).split(b"\n")
+            starts = []
+            start = position
+            for piece in pieces:
+                starts.append(start)
+                start += len(piece) + 1
+            # The first piece may be cut mid-line; keep it for the next block
+            # unless we have reached the start of the file.
+            first = 0 if position == 0 else 1
+            carry = pieces[0]
+            for raw, start in zip(reversed(pieces[first:]), reversed(starts[first:])):
+                offset = start
+                if _matches(raw, min_level, symbol):
+                    found.append(raw)
+                    if len(found) == n:
+                        break
+    return [raw.decode("utf-8", "replace") for raw in reversed(found)], offset
+
+
+def _matches(raw, min_level, symbol):
+    if not raw.strip():
+        return False
+    record = parse_line(raw.decode("utf-8", "replace"))
+    level_ok = LEVELS.index(record["level"]) >= min_level if record["level"] in LEVELS else True
+    return level_ok and (not symbol or record["symbol"] == symbol)
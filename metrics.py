@@ -0,0 +1,214 @@
+# metrics.py
+# Latency metrics for the trading loop. `span(stage)` times a block with
+# perf_counter; inside a `cycle()` the time is summed per stage and each
+# cycle's totals go into fixed-bucket histograms, from which p50/p95/p99 are
+# read the way Prometheus' histogram_quantile does. A cycle collects only the
+# spans of the thread that opened it, so concurrent cycles (one per profile
+# in multi_runner.py) stay apart; spans outside one (e.g. notifications
+# draining on their worker thread) are recorded on their own.
+# Histograms are saved to a JSON file so one-shot cron runs accumulate, and
+# can be served as Prometheus text for scraping.
+#
+#   python bot_engine.py --daemon --metrics-port 9108   # GET /metrics, /metrics.json
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+METRICS_PATH = "metrics.json"
+BUCKETS = tuple(0.0005 * 2 ** k for k in range(18))  # 0.5 ms .. ~65 s
+STAGES = ["fetch", "indicators", "signals", "orders", "notify", "cycle"]
+QUANTILES = (0.5, 0.95, 0.99)
+RECENT_CYCLES = 50
+
+
+# --- Histogram ---
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket holding the q-th observation;
+        # the +Inf bucket reports the largest finite bound.
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for k, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if k == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[k - 1] if k else 0.0
+                return lower + (self.buckets[k] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def to_dict(self):
+        return {"counts": self.counts, "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data, buckets=BUCKETS):
+        hist = cls(buckets)
+        hist.counts = list(data["counts"])
+        hist.sum = data["sum"]
+        hist.count = data["count"]
+        return hist
+
+
+# --- Registry ---
+class Metrics:
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.recent = deque(maxlen=RECENT_CYCLES)  # per-cycle stage totals
+        self._local = threading.local()  # .cycle: this thread's open cycle totals
+
+    def _observe(self, stage, seconds):
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = Histogram()
+        hist.observe(seconds)
+
+    def record(self, stage, seconds):
+        stages = getattr(self._local, "cycle", None)
+        if stages is None:
+            with self.lock:
+                self._observe(stage, seconds)
+        else:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    @contextmanager
+    def cycle(self):
+        outer = getattr(self._local, "cycle", None)
+        stages = self._local.cycle = {}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            self._local.cycle = outer
+            stages["cycle"] = total
+            with self.lock:
+                for stage, seconds in stages.items():
+                    self._observe(stage, seconds)
+                self.recent.append(dict(stages, time=time.time()))
+
+    # --- Reporting ---
+    def summary(self):
+        # {stage: {"count", "mean", "p50", "p95", "p99"}} in seconds.
+        with self.lock:
+            out = {}
+            order = [s for s in STAGES if s in self.histograms] + sorted(set(self.histograms) - set(STAGES))
+            for stage in order:
+                hist = self.histograms[stage]
+                row = {"count": hist.count, "mean": hist.sum / hist.count if hist.count else None}
+                row.update({f"p{round(q * 100)}": hist.quantile(q) for q in QUANTILES})
+                out[stage] = row
+            return out
+
+    def to_prometheus(self, prefix="bot"):
+        name = f"{prefix}_stage_seconds"
+        lines = [f"# HELP {name} Time spent per trading-cycle stage.", f"# TYPE {name} histogram"]
+        with self.lock:
+            for stage, hist in self.histograms.items():
+                cumulative = 0
+                for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {hist.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        summary = self.summary()
+        with self.lock:
+            return {
+                "buckets": list(BUCKETS),
+                "summary": summary,
+                "histograms": {stage: hist.to_dict() for stage, hist in self.histograms.items()},
+                "recent": list(self.recent),
+            }
+
+    # --- Persistence ---
+    def load(self, path=METRICS_PATH):
+        # Continue from a saved file (if any) and save back to it.
+        self.path = path
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return self
+            if tuple(data.get("buckets", ())) == BUCKETS:
+                with self.lock:
+                    self.histograms = {stage: Histogram.from_dict(h) for stage, h in data["histograms"].items()}
+                    self.recent.extend(data.get("recent", []))
+        return self
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+
+# Process-wide registry the bot's modules record into.
+METRICS = Metrics()
+
+
+def span(stage):
+    return METRICS.span(stage)
+
+
+# --- Export Endpoint ---
+def serve(metrics=METRICS, port=9108, host="0.0.0.0"):
+    # Serve /metrics (Prometheus text) and /metrics.json on a daemon thread;
+    # returns the server so the caller can shutdown() it.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, kind = metrics.to_prometheus().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, kind = json.dumps(metrics.to_dict()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
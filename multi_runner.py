@@ -0,0 +1,233 @@
+# multi_runner.py
+# Runs several settings profiles (e.g. one per paper account) in one process.
+# Each cycle the bars every profile needs are downloaded once into a shared
+# read-only store, the profiles are evaluated concurrently (each with its own
+# indicator state, order book and Alpaca client), and their orders go out
+# through one bounded worker pool.
+#
+#   python multi_runner.py settings_swing.json settings_pairs.json
+#   python multi_runner.py profiles/*.json --daemon --order-workers 8
+#
+# A profile is a settings.json; its optional "account" section names the
+# profile and the environment variables holding that account's keys:
+#   "account": {"name": "swing", "key_id_env": "SWING_KEY_ID",
+#               "secret_key_env": "SWING_SECRET_KEY", "base_url": "https://paper-api.alpaca.markets"}
+# A variable it names must be set. Without the section a profile trades
+# bot_engine's account, and no two profiles may resolve to the same key.
+
+import argparse
+import json
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import bot_engine
+from bot_engine import close_notifier, get_notifier, log, log_sink
+from metrics import METRICS, serve as serve_metrics, span
+from order_book import OrderBook, stream_trade_updates
+from scheduler import BarScheduler, is_market_open
+
+ORDER_WORKERS = 8
+
+
+# --- Shared Market Data ---
+class SharedBars:
+    """One cycle's bars, downloaded once and read by every profile.
+
+    `get` has bar_store.get_bars_many's signature, so it plugs into
+    StrategyEngine as its `fetch`. Frames are shared, not copied; strategies
+    only read them.
+    """
+
+    def __init__(self, fetch=None):
+        self.fetch = fetch
+        self.frames = {}
+
+    def load(self, wanted):
+        # {(period, interval): [symbols]} -> one batched request per key.
+        if self.fetch is None:
+            from bar_store import get_bars_many
+            self.fetch = get_bars_many
+        self.frames = {key: self.fetch(symbols, *key) for key, symbols in wanted.items()}
+
+    def get(self, symbols, period, interval):
+        frames = self.frames.get((period, interval), {})
+        return {s: frames[s] for s in symbols if s in frames}
+
+
+# --- Profiles ---
+class Profile:
+    def __init__(self, path, shared):
+        from indicators import IndicatorStore
+        from strategies import StrategyEngine
+
+        self.path = path
+        self.settings = {}
+        self._mtime = None
+        self.refresh()
+        account = self.settings.get("account", {})
+        self.name = account.get("name") or os.path.splitext(os.path.basename(path))[0]
+        self.key_id = self._credential(account, "key_id_env", bot_engine.APCA_API_KEY_ID)
+        self.secret_key = self._credential(account, "secret_key_env", bot_engine.APCA_API_SECRET_KEY)
+        self.base_url = account.get("base_url", bot_engine.APCA_API_BASE_URL)
+        self.store = IndicatorStore(f"indicator_state_{self.name}.json")
+        self.engine = StrategyEngine(self.store, log=self.log, fetch=shared.get)
+        self.book = OrderBook(log=self.log)
+        self._api = None
+        self._api_lock = threading.Lock()
+
+    def _credential(self, account, field, default):
+        # A named variable must be set: an empty key would make alpaca fall
+        # back to the process-wide APCA_* credentials, i.e. another account.
+        if field not in account:
+            return default
+        value = os.getenv(account[field])
+        if not value:
+            raise ValueError(f"Profile {self.name}: environment variable {account[field]} ({field}) is not set")
+        return value
+
+    def log(self, message, level="INFO", symbol=None):
+        log(f"[{self.name}] {message}", level=level, symbol=symbol)
+
+    def refresh(self):
+        mtime = os.path.getmtime(self.path)
+        if mtime != self._mtime:
+            with open(self.path, "r") as f:
+                self.settings = json.load(f)
+            self._mtime = mtime
+
+    @property
+    def api(self):
+        # Built once per process, on first use.
+        with self._api_lock:
+            if self._api is None:
+                from alpaca_trade_api.rest import REST
+                self._api = REST(self.key_id, self.secret_key, self.base_url)
+            return self._api
+
+    def strategies(self):
+        from strategies import active_strategies
+        return active_strategies(self.settings)
+
+    def universe(self):
+        return self.settings.get("symbols", ["AAPL", "MSFT", "GOOGL"])
+
+    def bar_requests(self, wanted):
+        from strategies import STRATEGIES
+        strategies = [STRATEGIES[name](self.settings) for name in self.strategies()]
+        return self.engine.bar_requests(strategies, self.universe(), wanted)
+
+    def run(self, notifier, pool):
+        # Evaluate against the shared bars and route the orders through `pool`.
+        from execution import execute_orders
+
+        # One metrics cycle per profile; they run concurrently on their own threads.
+        with METRICS.cycle():
+            orders = self.engine.evaluate(self.strategies(), self.settings, self.universe())
+            if orders:
+                self.book.reconcile(self.api)
+            return execute_orders(self.api, orders, notifier, log=self.log, book=self.book, pool=pool)
+
+
+# --- Runner ---
+class MultiRunner:
+    def __init__(self, paths, order_workers=ORDER_WORKERS, fetch=None):
+        self.shared = SharedBars(fetch)
+        self.profiles = [Profile(path, self.shared) for path in paths]
+        names = [p.name for p in self.profiles]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate profile names: {', '.join(duplicates)}")
+        # Two profiles on one account would trade against each other's positions.
+        accounts = {}
+        for p in self.profiles:
+            accounts.setdefault(p.key_id, []).append(p.name)
+        shared = [names for names in accounts.values() if len(names) > 1]
+        if shared:
+            raise ValueError("Profiles share an account: " + "; ".join(", ".join(names) for names in shared)
+                             + " (give each an \"account\" section with its own key_id_env)")
+        self.order_pool = ThreadPoolExecutor(order_workers, thread_name_prefix="orders")
+        self.profile_pool = ThreadPoolExecutor(len(self.profiles), thread_name_prefix="profile")
+
+    def run_cycle(self):
+        # Returns {profile name: {symbol: order or exception}}.
+        wanted = {}
+        for profile in self.profiles:
+            profile.refresh()
+            profile.bar_requests(wanted)
+        with span("fetch"):
+            self.shared.load(wanted)
+        futures = {p.name: self.profile_pool.submit(p.run, get_notifier(), self.order_pool)
+                   for p in self.profiles}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                log(f"[{name}] Cycle error: {e}", level="ERROR")
+        for profile in self.profiles:
+            profile.store.save()
+        METRICS.save()
+        n_symbols = sum(len(symbols) for symbols in wanted.values())
+        log(f"🤖 Multi-profile run complete: {len(self.profiles)} profiles, {n_symbols} symbols fetched once.")
+        log_sink.flush()
+        return results
+
+    def close(self):
+        self.profile_pool.shutdown()
+        self.order_pool.shutdown()
+        for profile in self.profiles:
+            profile.store.save()
+        close_notifier()
+
+    def run_daemon(self, interval_minutes=15):
+        scheduler = BarScheduler(interval_minutes)
+        signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+        signal.signal(signal.SIGINT, lambda *_: scheduler.stop())
+        log(f"🟢 Multi-profile daemon started: {', '.join(p.name for p in self.profiles)} ({interval_minutes}m bars).")
+        streams = []
+        for profile in self.profiles:
+            profile.book.reconcile(profile.api, force=True)
+            streams.append(stream_trade_updates(profile.book, profile.key_id, profile.secret_key, profile.base_url))
+
+        while not scheduler.stopped:
+            wake = scheduler.next_run()
+            if not is_market_open():
+                log(f"💤 Market closed. Sleeping until {wake.strftime('%Y-%m-%d %H:%M:%S %Z')}.")
+            if scheduler.sleep_until(wake):
+                break
+            try:
+                self.run_cycle()
+            except Exception as e:
+                log(f"Cycle error: {e}", level="ERROR")
+
+        for stream in streams:
+            stream.stop()
+        self.close()
+        log("🛑 Multi-profile daemon stopped.")
+        log_sink.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run several settings profiles on one shared market-data feed")
+    parser.add_argument("profiles", nargs="+", help="settings.json files, one per account/profile")
+    parser.add_argument("--daemon", action="store_true", help="stay running and trade every bar close")
+    parser.add_argument("--interval", type=int, default=15, help="bar interval in minutes for --daemon")
+    parser.add_argument("--order-workers", type=int, default=ORDER_WORKERS, help="max orders in flight")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus /metrics on this port")
+    args = parser.parse_args()
+
+    if not args.daemon and not is_market_open():
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Market is closed. Bot will not run.")
+    else:
+        runner = MultiRunner(args.profiles, args.order_workers)
+        if args.metrics_port:
+            serve_metrics(METRICS, args.metrics_port)
+        if args.daemon:
+            runner.run_daemon(args.interval)
+        else:
+            runner.run_cycle()
+            runner.close()
+            log_sink.close()
@@ -0,0 +1,169 @@
+# optimizer.py
+# Grid / random parameter sweep for the MA+RSI strategy. Combinations are
+# chunked per symbol and spread over a process pool; inside a chunk every
+# rolling MA window and RSI period is computed once and shared by all the
+# parameter sets that use it.
+
+import argparse
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from backtest_core import (EXECUTION_DEFAULTS, execution_metrics, fill_metrics, long_flat_fills, ma_rsi_masks, rsi,
+                           simulate_execution)
+from bar_store import get_bars_many
+
+# --- Search Space (mirrors the backtest_dashboard.py slider ranges) ---
+SEARCH_SPACE = {
+    "fast_ma": list(range(3, 21, 2)),
+    "slow_ma": list(range(10, 51, 5)),
+    "rsi_period": [7, 10, 14, 21],
+    "rsi_buy": list(range(20, 51, 5)),
+    "rsi_sell": list(range(50, 91, 5)),
+}
+PARAM_NAMES = list(SEARCH_SPACE)
+CHUNK_SIZE = 1000
+
+
+def _valid(params):
+    return params["fast_ma"] < params["slow_ma"] and params["rsi_buy"] < params["rsi_sell"]
+
+
+def grid_params(space=SEARCH_SPACE):
+    combos = (dict(zip(PARAM_NAMES, values)) for values in itertools.product(*(space[k] for k in PARAM_NAMES)))
+    return [p for p in combos if _valid(p)]
+
+
+def random_params(n, space=SEARCH_SPACE, seed=None):
+    rng = random.Random(seed)
+    seen = set()
+    combos = []
+    attempts = 0
+    while len(combos) < n and attempts < n * 20:
+        attempts += 1
+        p = {k: rng.choice(space[k]) for k in PARAM_NAMES}
+        key = tuple(p.values())
+        if _valid(p) and key not in seen:
+            seen.add(key)
+            combos.append(p)
+    return combos
+
+
+# --- Shared Indicators ---
+class SharedIndicators:
+    # Lazily computes and memoizes each MA window / RSI period for one series.
+    def __init__(self, close):
+        self.close = close
+        self._ma = {}
+        self._rsi = {}
+
+    def ma(self, window):
+        if window not in self._ma:
+            self._ma[window] = self.close.rolling(window).mean().to_numpy(dtype=float)
+        return self._ma[window]
+
+    def rsi(self, period):
+        if period not in self._rsi:
+            self._rsi[period] = rsi(self.close, period).to_numpy(dtype=float)
+        return self._rsi[period]
+
+
+def evaluate_chunk(symbol, bars, combos, execution=None):
+    # bars: {"Open", "High", "Low", "Close"} arrays. Without `execution`
+    # fills are at the signal close with no costs.
+    close = bars["Close"]
+    shared = SharedIndicators(pd.Series(close))
+    model = {**EXECUTION_DEFAULTS, **execution} if execution is not None else None
+    rows = []
+    for p in combos:
+        entry, exit_ = ma_rsi_masks(
+            shared.ma(p["fast_ma"]), shared.ma(p["slow_ma"]), shared.rsi(p["rsi_period"]),
+            p["rsi_buy"], p["rsi_sell"],
+        )
+        if model is None:
+            metrics = fill_metrics(close, long_flat_fills(entry, exit_))
+        else:
+            _, prices = simulate_execution(bars["Open"], bars["High"], bars["Low"], close, entry, exit_, **model)
+            metrics = execution_metrics(prices, **model)
+        rows.append({"symbol": symbol, **p, **metrics})
+    return rows
+
+
+# --- Sweep ---
+def run_sweep(symbols, combos, period="3mo", interval="1h", workers=None, chunk_size=CHUNK_SIZE, execution=None):
+    # Bars are fetched once in the parent (one batched request) and each
+    # worker only receives the price arrays it needs.
+    bars = get_bars_many(symbols, period, interval)
+    columns = ["Close"] if execution is None else ["Open", "High", "Low", "Close"]
+    arrays = {s: {c: df[c].to_numpy(dtype=float) for c in columns} for s, df in bars.items() if not df.empty}
+    for s in symbols:
+        if s not in arrays:
+            print(f"⚠️ No data for {s}, skipping.")
+
+    # Sort so each chunk covers few distinct windows and shares the most work.
+    combos = sorted(combos, key=lambda p: (p["rsi_period"], p["slow_ma"], p["fast_ma"]))
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate_chunk, s, a, chunk, execution) for s, a in arrays.items() for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), 1):
+            rows.extend(future.result())
+            if done % 50 == 0 or done == len(futures):
+                print(f"⏳ {done}/{len(futures)} chunks done")
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    results = results.sort_values("return_pct", ascending=False, ignore_index=True)
+    results.insert(0, "rank", results.index + 1)
+    return results
+
+
+def rank_across_symbols(results):
+    # Parameter sets ranked by their average return over every symbol swept.
+    summary = results.groupby(PARAM_NAMES).agg(
+        avg_return_pct=("return_pct", "mean"),
+        avg_win_rate=("win_rate", "mean"),
+        total_trades=("total_trades", "sum"),
+    )
+    return summary.sort_values("avg_return_pct", ascending=False).reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MA + RSI parameter sweep")
+    parser.add_argument("--symbols", nargs="+", default=["AAPL", "MSFT", "GOOGL"])
+    parser.add_argument("--period", default="3mo")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=500, help="combinations for random mode")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="optimizer_results.csv")
+    parser.add_argument("--fill-at", choices=["close", "next_open"], default=None,
+                        help="simulate fills and costs (default: signal close, no costs)")
+    parser.add_argument("--latency-bars", type=int, default=0)
+    parser.add_argument("--spread-bps", type=float, default=0.0)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--commission", type=float, default=0.0, help="$ per share per fill")
+    args = parser.parse_args()
+
+    execution = None
+    if args.fill_at or args.spread_bps or args.slippage_bps or args.commission or args.latency_bars:
+        execution = {"fill_at": args.fill_at or "next_open", "latency_bars": args.latency_bars,
+                     "spread_bps": args.spread_bps, "slippage_bps": args.slippage_bps,
+                     "commission": args.commission}
+
+    combos = grid_params() if args.mode == "grid" else random_params(args.samples, seed=args.seed)
+    print(f"🔍 Sweeping {len(combos)} combinations x {len(args.symbols)} symbols on {args.workers} workers...")
+    results = run_sweep(args.symbols, combos, args.period, args.interval, args.workers, execution=execution)
+    if results.empty:
+        print("No results.")
+    else:
+        results.to_csv(args.out, index=False)
+        print(f"\n💾 {len(results)} rows written to {args.out}")
+        print("\n🏆 Top parameter sets across symbols")
+        print(rank_across_symbols(results).head(10).to_string(index=False))
@@ -0,0 +1,183 @@
+# order_book.py
+# In-memory position and open-order book for the bot. Seeded from the REST
+# API once per session, kept current from trade_updates events (or any
+# caller feeding the same events), and reconciled against REST every few
+# minutes, so strategies can check position state with a dict lookup
+# instead of a list_positions/list_orders call per symbol.
+
+import threading
+import time
+from collections import deque
+
+RECONCILE_SECONDS = 300
+# Finished order ids remembered for late events; older ones are forgotten.
+CLOSED_IDS = 1000
+# Events after which an order is no longer working.
+TERMINAL_EVENTS = {"fill", "canceled", "expired", "rejected", "replaced", "done_for_day"}
+
+
+def _field(obj, name, default=None):
+    # REST entities, stream entities and plain dicts all work.
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _signed(side, qty):
+    return qty if side == "buy" else -qty
+
+
+class OrderBook:
+    def __init__(self, reconcile_seconds=RECONCILE_SECONDS, log=None):
+        self.reconcile_seconds = reconcile_seconds
+        self.log = log or (lambda message, level="INFO", symbol=None: None)
+        self.lock = threading.Lock()
+        self.positions = {}  # symbol -> signed qty
+        self.orders = {}  # order id -> {"symbol", "side", "qty", "filled"}
+        self.pending = {}  # (symbol, side) -> number of working orders
+        self.closed = set()  # ids of finished orders, so late events are ignored
+        self._closed_order = deque()  # the same ids, oldest first, to bound `closed`
+        self.synced_at = None
+
+    # --- Queries (O(1)) ---
+    def position(self, symbol):
+        return self.positions.get(symbol, 0.0)
+
+    def has_open_order(self, symbol, side=None):
+        if side:
+            return self.pending.get((symbol, side), 0) > 0
+        return self.pending.get((symbol, "buy"), 0) > 0 or self.pending.get((symbol, "sell"), 0) > 0
+
+    def allow(self, symbol, side):
+        """Return (ok, reason) for sending a `side` order on `symbol`.
+
+        An order is refused when one on the same side is still working, or
+        when the position is already on that side (long for a buy, short for
+        a sell), so a repeated signal doesn't stack orders every cycle.
+        """
+        with self.lock:
+            if self.has_open_order(symbol, side):
+                return False, f"open {side} order pending"
+            qty = self.position(symbol)
+            if (side == "buy" and qty > 0) or (side == "sell" and qty < 0):
+                return False, f"already {'long' if qty > 0 else 'short'} {abs(qty):g}"
+            return True, None
+
+    # --- Seeding & Reconciliation ---
+    def seed(self, api):
+        # Replace the book with the broker's view; returns the symbols whose
+        # position differed from what the book held.
+        positions = {p.symbol: float(p.qty) for p in api.list_positions()}
+        orders = {}
+        for o in api.list_orders(status="open"):
+            orders[o.id] = {"symbol": o.symbol, "side": o.side, "qty": float(o.qty or 0),
+                            "filled": float(o.filled_qty or 0)}
+        drift = self.restore({"positions": positions, "orders": orders})
+        self.synced_at = time.monotonic()
+        return drift
+
+    def snapshot(self):
+        with self.lock:
+            return {"positions": dict(self.positions), "orders": {k: dict(v) for k, v in self.orders.items()}}
+
+    def restore(self, snapshot):
+        # Load a snapshot() (from REST or the journal); returns the symbols
+        # whose position changed. Only seed() marks the book as synced: a
+        # journal snapshot may be days old, so the next order path reconciles.
+        positions = {s: float(q) for s, q in snapshot["positions"].items()}
+        orders = {k: dict(v) for k, v in snapshot["orders"].items()}
+        with self.lock:
+            drift = sorted(s for s in set(positions) | set(self.positions)
+                           if abs(positions.get(s, 0.0) - self.positions.get(s, 0.0)) > 1e-9)
+            self.positions = positions
+            self.orders = orders
+            self.pending = {}
+            for order in orders.values():
+                key = (order["symbol"], order["side"])
+                self.pending[key] = self.pending.get(key, 0) + 1
+        return drift
+
+    def needs_reconcile(self):
+        return self.synced_at is None or time.monotonic() - self.synced_at >= self.reconcile_seconds
+
+    def reconcile(self, api, force=False):
+        if not force and not self.needs_reconcile():
+            return []
+        # A book restored from the journal held state, so its drift is news.
+        first = self.synced_at is None and not self.positions and not self.orders
+        drift = self.seed(api)
+        if drift and not first:
+            self.log(f"Order book drift corrected for {', '.join(drift)}.", level="WARNING")
+        return drift
+
+    # --- Updates ---
+    def on_submitted(self, order):
+        # Record an order from the submit response, before its stream event.
+        with self.lock:
+            if _field(order, "id") not in self.closed:
+                self._track(order)
+
+    def _track(self, order):
+        order_id = _field(order, "id")
+        if order_id in self.orders:
+            return self.orders[order_id]
+        entry = {"symbol": _field(order, "symbol"), "side": _field(order, "side"),
+                 "qty": float(_field(order, "qty") or 0), "filled": float(_field(order, "filled_qty") or 0)}
+        self.orders[order_id] = entry
+        key = (entry["symbol"], entry["side"])
+        self.pending[key] = self.pending.get(key, 0) + 1
+        # Fills seen before we knew about the order.
+        if entry["filled"]:
+            self.positions[entry["symbol"]] = self.position(entry["symbol"]) + _signed(entry["side"], entry["filled"])
+        return entry
+
+    def on_trade_update(self, update):
+        # Apply one trade_updates event: {"event", "order", "position_qty", ...}.
+        event = _field(update, "event")
+        order = _field(update, "order") or {}
+        order_id = _field(order, "id")
+        with self.lock:
+            if order_id in self.closed:
+                return
+            entry = self._track(order)
+            if event in ("fill", "partial_fill"):
+                filled = float(_field(order, "filled_qty") or 0)
+                delta = filled - entry["filled"]
+                entry["filled"] = filled
+                position_qty = _field(update, "position_qty")
+                if position_qty is not None:
+                    # The event carries the broker's position after the fill.
+                    self.positions[entry["symbol"]] = float(position_qty)
+                else:
+                    self.positions[entry["symbol"]] = self.position(entry["symbol"]) + _signed(entry["side"], delta)
+                if self.positions[entry["symbol"]] == 0:
+                    del self.positions[entry["symbol"]]
+            if event in TERMINAL_EVENTS:
+                self.orders.pop(order_id, None)
+                self._close(order_id)
+                key = (entry["symbol"], entry["side"])
+                self.pending[key] -= 1
+                if not self.pending[key]:
+                    del self.pending[key]
+
+    def _close(self, order_id):
+        self.closed.add(order_id)
+        self._closed_order.append(order_id)
+        if len(self._closed_order) > CLOSED_IDS:
+            self.closed.discard(self._closed_order.popleft())
+
+    async def handle_trade_update(self, update):
+        # Async handler for alpaca_trade_api Stream.subscribe_trade_updates.
+        self.on_trade_update(update)
+
+
+def stream_trade_updates(book, key_id, secret_key, base_url, handler=None):
+    # Keep `book` current from the trade_updates WebSocket on a daemon
+    # thread; returns the Stream so the caller can stop() it. A custom async
+    # `handler` must pass each update on to the book itself.
+    from alpaca_trade_api.stream import Stream
+
+    stream = Stream(key_id, secret_key, base_url)
+    stream.subscribe_trade_updates(handler or book.handle_trade_update)
+    threading.Thread(target=stream.run, name="trade-updates", daemon=True).start()
+    return stream
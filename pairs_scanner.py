@@ -0,0 +1,199 @@
+# pairs_scanner.py
+# Pairs / cointegration scan over a symbol universe. Prices are aligned into
+# one (time x symbol) matrix; a single covariance product gives every pair's
+# OLS hedge ratio and return correlation at once, weakly correlated pairs are
+# pruned, and the survivors are scored in batches (Engle-Granger ADF
+# statistic on the residual spread, AR(1) half-life, current rolling z) on a
+# process pool. The top pairs can be written into settings.json for the bot.
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bar_store import get_bars_many
+
+# Bars in the live z-score window: PairsZscore feeds pairs.lookback_days (15 by
+# default) straight to ZScore as a bar count. The CLI reads it from settings.json.
+LOOKBACK = 15
+MIN_CORR = 0.7
+CHUNK_SIZE = 2000
+MIN_COVERAGE = 0.9
+# Engle-Granger 5% critical value for two variables (no lags, with constant).
+ADF_CRITICAL = -3.34
+
+
+# --- Data ---
+def price_matrix(bars, min_coverage=MIN_COVERAGE):
+    """{symbol: OHLCV frame} -> (index, symbols, prices[time, symbol]) as float64.
+
+    Symbols with bars on fewer than `min_coverage` of the timestamps are
+    dropped; remaining gaps are forward-filled and leading rows with any gap
+    are trimmed, so every column is complete.
+    """
+    closes = pd.concat({s: df["Close"] for s, df in bars.items() if not df.empty}, axis=1).sort_index()
+    keep = closes.notna().mean() >= min_coverage
+    for s in closes.columns[~keep]:
+        print(f"⚠️ {s} has too few bars, skipping.")
+    closes = closes.loc[:, keep].ffill().dropna()
+    return closes.index, list(closes.columns), closes.to_numpy(dtype=np.float64)
+
+
+# --- Hedge Ratios & Prefilter ---
+def pair_stats(prices, min_corr=MIN_CORR):
+    """Return (i, j, corr, beta, alpha) arrays for pairs with |corr| >= min_corr.
+
+    corr is the correlation of log returns; beta/alpha are the OLS fit
+    prices[:, i] = alpha + beta * prices[:, j], all read off one covariance
+    matrix instead of a regression per pair.
+    """
+    n = prices.shape[1]
+    returns = np.diff(np.log(prices), axis=0)
+    corr = np.corrcoef(returns, rowvar=False)
+    mean = prices.mean(axis=0)
+    centered = prices - mean
+    cov = centered.T @ centered
+    i, j = np.triu_indices(n, 1)
+    keep = np.abs(corr[i, j]) >= min_corr
+    i, j = i[keep], j[keep]
+    beta = cov[i, j] / cov[j, j]
+    alpha = mean[i] - beta * mean[j]
+    return i, j, corr[i, j], beta, alpha
+
+
+# --- Spread Scoring ---
+_PRICES = None
+
+
+def _init_worker(prices):
+    # The price matrix is sent once per worker instead of once per chunk.
+    global _PRICES
+    _PRICES = prices
+
+
+def score_chunk(i, j, beta, alpha, lookback=LOOKBACK, prices=None):
+    """Score a batch of pairs; returns (adf_t, half_life, zscore) arrays.
+
+    Spreads for the whole batch form one (time x pairs) matrix, so the
+    ADF regression ds_t = c + phi * s_{t-1} is solved for every column in a
+    few array reductions.
+    """
+    prices = _PRICES if prices is None else prices
+    spread = prices[:, i] - beta * prices[:, j] - alpha
+    lag = spread[:-1]
+    ds = np.diff(spread, axis=0)
+    lag_c = lag - lag.mean(axis=0)
+    ds_c = ds - ds.mean(axis=0)
+    sxx = (lag_c * lag_c).sum(axis=0)
+    phi = (lag_c * ds_c).sum(axis=0) / sxx
+    resid = ds_c - phi * lag_c
+    se = np.sqrt((resid * resid).sum(axis=0) / (len(ds) - 2) / sxx)
+    adf_t = phi / se
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half_life = np.where(phi < 0, -np.log(2) / np.log1p(phi), np.inf)
+
+    window = spread[-lookback:]
+    std = window.std(axis=0, ddof=1)
+    zscore = (spread[-1] - window.mean(axis=0)) / np.where(std > 0, std, np.nan)
+    return adf_t, half_life, zscore
+
+
+def scan_pairs(symbols, prices, lookback=LOOKBACK, min_corr=MIN_CORR, workers=None, chunk_size=CHUNK_SIZE):
+    """Return a DataFrame of candidate pairs, most cointegrated first.
+
+    Columns: symbol_y, symbol_x, corr, hedge_ratio, intercept, adf_t,
+    half_life (bars), zscore (current, over `lookback` bars).
+    """
+    i, j, corr, beta, alpha = pair_stats(prices, min_corr)
+    n_pairs = len(symbols) * (len(symbols) - 1) // 2
+    print(f"🔗 {len(i)} of {n_pairs} pairs pass |corr| >= {min_corr}")
+    if not len(i):
+        return pd.DataFrame()
+
+    bounds = range(0, len(i), chunk_size)
+    if workers == 1 or len(i) <= chunk_size:
+        parts = [score_chunk(i[k:k + chunk_size], j[k:k + chunk_size], beta[k:k + chunk_size],
+                             alpha[k:k + chunk_size], lookback, prices) for k in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(prices,)) as pool:
+            futures = [pool.submit(score_chunk, i[k:k + chunk_size], j[k:k + chunk_size],
+                                   beta[k:k + chunk_size], alpha[k:k + chunk_size], lookback) for k in bounds]
+            parts = [f.result() for f in futures]
+    adf_t, half_life, zscore = (np.concatenate(p) for p in zip(*parts))
+
+    names = np.array(symbols)
+    results = pd.DataFrame({
+        "symbol_y": names[i], "symbol_x": names[j], "corr": corr, "hedge_ratio": beta, "intercept": alpha,
+        "adf_t": adf_t, "half_life": half_life, "zscore": zscore,
+    })
+    return results.sort_values("adf_t", ignore_index=True)
+
+
+def top_pairs(results, n=10, max_half_life=None, critical=ADF_CRITICAL):
+    # Cointegrated pairs (ADF below the critical value), each symbol used once.
+    picked = results[results["adf_t"] < critical]
+    if max_half_life:
+        picked = picked[picked["half_life"] <= max_half_life]
+    used = set()
+    rows = []
+    for row in picked.itertuples(index=False):
+        if row.symbol_y in used or row.symbol_x in used:
+            continue
+        used.update((row.symbol_y, row.symbol_x))
+        rows.append(row)
+        if len(rows) == n:
+            break
+    return pd.DataFrame(rows, columns=results.columns)
+
+
+def to_candidates(pairs):
+    # The settings["pairs"]["candidates"] entries PairsZscore trades.
+    return [{"symbols": [r.symbol_y, r.symbol_x], "hedge_ratio": round(float(r.hedge_ratio), 6)}
+            for r in pairs.itertuples(index=False)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan a symbol universe for cointegrated pairs")
+    parser.add_argument("--symbols", nargs="+")
+    parser.add_argument("--symbols-file", help="one symbol per line")
+    parser.add_argument("--period", default="60d")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--lookback", type=int, default=None,
+                        help="z-score window in bars (default: pairs.lookback_days from settings.json)")
+    parser.add_argument("--min-corr", type=float, default=MIN_CORR)
+    parser.add_argument("--max-half-life", type=float, default=None, help="in bars")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="pairs_scan.csv")
+    parser.add_argument("--apply", action="store_true", help="write the top pairs into settings.json")
+    args = parser.parse_args()
+
+    settings = {}
+    if os.path.exists("settings.json"):
+        with open("settings.json", "r") as f:
+            settings = json.load(f)
+    symbols = args.symbols or settings.get("symbols", ["AAPL", "MSFT", "GOOGL"])
+    lookback = args.lookback or settings.get("pairs", {}).get("lookback_days", LOOKBACK)
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            symbols = [line.strip().upper() for line in f if line.strip()]
+
+    print(f"📥 Loading {len(symbols)} symbols ({args.period}, {args.interval})...")
+    index, names, prices = price_matrix(get_bars_many(symbols, args.period, args.interval))
+    results = scan_pairs(names, prices, lookback, args.min_corr, args.workers)
+    if results.empty:
+        print("No pairs found.")
+    else:
+        results.to_csv(args.out, index=False)
+        print(f"\n💾 {len(results)} pairs written to {args.out}")
+        best = top_pairs(results, args.top, args.max_half_life)
+        print("\n🏆 Top cointegrated pairs")
+        print(best.round(3).to_string(index=False))
+        if args.apply:
+            settings.setdefault("pairs", {})["candidates"] = to_candidates(best)
+            with open("settings.json", "w") as f:
+                json.dump(settings, f, indent=4)
+            print(f"\n✅ {len(best)} pairs saved to settings.json")
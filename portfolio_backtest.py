@@ -0,0 +1,225 @@
+# portfolio_backtest.py
+# Multi-symbol portfolio backtest on a shared time index. Closes are aligned
+# into one (time x symbol) float32 matrix, indicators and entry/exit masks for
+# every symbol are computed in whole-matrix operations, and a single pass over
+# time applies exits, cash-constrained entries and per-symbol sizing to all
+# symbols at once.
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtest_core import ma_rsi_masks
+from bar_store import get_bars_many
+
+DTYPE = np.float32
+
+
+# --- Data ---
+def align_closes(bars, dtype=DTYPE):
+    # {symbol: OHLCV frame} -> (index, symbols, closes[time, symbol]).
+    # Gaps are forward-filled; bars before a symbol's first print stay NaN.
+    frames = {s: df["Close"] for s, df in bars.items() if not df.empty}
+    closes = pd.concat(frames, axis=1).sort_index().ffill()
+    return closes.index, list(closes.columns), closes.to_numpy(dtype=dtype)
+
+
+# --- 2-D Indicators ---
+# Rolling windows use float64 cumulative sums over a per-symbol reference
+# price (which keeps the sums small and accurate) and are stored as float32.
+def _rolling_sum(x, window):
+    csum = np.nancumsum(x, axis=0, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    out[window - 1:] = csum[window - 1:]
+    out[window:] -= csum[:-window]
+    # A window containing any NaN is undefined, like pandas rolling().
+    nan_count = np.cumsum(np.isnan(x), axis=0)
+    bad = nan_count[window - 1:].copy()
+    bad[1:] -= nan_count[:-window]
+    out[window - 1:][bad > 0] = np.nan
+    return out
+
+
+def _reference(close):
+    first = np.argmax(~np.isnan(close), axis=0)
+    return close[first, np.arange(close.shape[1])].astype(np.float64)
+
+
+def rolling_mean(close, window, dtype=DTYPE):
+    ref = _reference(close)
+    return (_rolling_sum(close - ref, window) / window + ref).astype(dtype)
+
+
+def rolling_std(close, window, dtype=DTYPE):
+    # Sample std (ddof=1) like pandas.
+    x = close.astype(np.float64) - _reference(close)
+    s1 = _rolling_sum(x, window)
+    s2 = _rolling_sum(x * x, window)
+    var = np.maximum((s2 - s1 * s1 / window) / (window - 1), 0)
+    return np.sqrt(var).astype(dtype)
+
+
+def rsi(close, period, dtype=DTYPE):
+    delta = np.full(close.shape, np.nan)
+    delta[1:] = np.diff(close.astype(np.float64), axis=0)
+    # np.maximum keeps NaN, so missing bars stay missing in the windows.
+    gain = _rolling_sum(np.maximum(delta, 0), period) / period
+    loss = _rolling_sum(np.maximum(-delta, 0), period) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100 - 100 / (1 + gain / loss)
+    return out.astype(dtype)
+
+
+# --- Strategy Masks ---
+def ma_rsi_signals(close, fast_ma=5, slow_ma=20, rsi_period=14, rsi_buy=30, rsi_sell=70):
+    return ma_rsi_masks(rolling_mean(close, fast_ma), rolling_mean(close, slow_ma),
+                        rsi(close, rsi_period), rsi_buy, rsi_sell)
+
+
+def bollinger_rsi_signals(close, window=20, std_dev=2, rsi_thresh=35, rsi_period=14):
+    ma = rolling_mean(close, window)
+    band = std_dev * rolling_std(close, window)
+    rsi_values = rsi(close, rsi_period)
+    entry = (close < ma - band) & (rsi_values < rsi_thresh)
+    exit_ = (close > ma + band) & (rsi_values > 100 - rsi_thresh)
+    return entry, exit_
+
+
+STRATEGIES = {
+    "ma_rsi_combo": ma_rsi_signals,
+    "bollinger_rsi": bollinger_rsi_signals,
+}
+
+
+# --- Portfolio Simulation ---
+def simulate(close, entry, exit_, weights, initial_cash=100_000.0, fractional=False):
+    """Long/flat portfolio over aligned (time x symbol) arrays.
+
+    Fills are at the signal bar's close. Each bar, exits are applied first, then
+    entries for flat symbols are sized at `weights[j]` x current equity and
+    filled in symbol order while cash lasts.
+    """
+    T, N = close.shape
+    shares = np.zeros(N)
+    basis = np.zeros(N)
+    realized = np.zeros(N)
+    cash = float(initial_cash)
+    equity = np.empty(T)
+    traded = 0.0
+    trades = 0
+    px_last = np.zeros(N)
+
+    for t in range(T):
+        px = close[t].astype(np.float64)
+        valid = ~np.isnan(px)
+        px_last[valid] = px[valid]
+
+        sell = exit_[t] & (shares > 0) & valid
+        if sell.any():
+            proceeds = shares[sell] * px[sell]
+            realized[sell] += proceeds - basis[sell]
+            cash += proceeds.sum()
+            traded += proceeds.sum()
+            trades += int(sell.sum())
+            shares[sell] = 0
+            basis[sell] = 0
+
+        buy = entry[t] & (shares == 0) & valid
+        if buy.any():
+            idx = np.flatnonzero(buy)
+            qty = (cash + shares @ px_last) * weights[idx] / px[idx]
+            if not fractional:
+                qty = np.floor(qty)
+            cost = qty * px[idx]
+            # Costs are non-negative, so this keeps the prefix cash can cover.
+            ok = (np.cumsum(cost) <= cash) & (qty > 0)
+            shares[idx[ok]] = qty[ok]
+            basis[idx[ok]] = cost[ok]
+            cash -= cost[ok].sum()
+            traded += cost[ok].sum()
+            trades += int(ok.sum())
+
+        equity[t] = cash + shares @ px_last
+
+    return {"equity": equity, "realized": realized, "shares": shares, "cash": cash,
+            "traded": traded, "trades": trades}
+
+
+def portfolio_report(index, symbols, sim, initial_cash):
+    equity = pd.Series(sim["equity"], index=index, name="Equity")
+    drawdown = equity / equity.cummax() - 1
+    years = max((index[-1] - index[0]).days / 365.25, 1e-9) if len(index) > 1 else 1
+    return {
+        "equity": equity,
+        "drawdown": drawdown,
+        "per_symbol_pl": pd.Series(sim["realized"], index=symbols, name="Realized P/L"),
+        "final_equity": float(equity.iloc[-1]),
+        "total_return_pct": float((equity.iloc[-1] / initial_cash - 1) * 100),
+        "max_drawdown_pct": float(drawdown.min() * 100),
+        "turnover": float(sim["traded"] / equity.mean()),
+        "annual_turnover": float(sim["traded"] / equity.mean() / years),
+        "trades": sim["trades"],
+    }
+
+
+def run_portfolio(bars, strategy="ma_rsi_combo", params=None, weights=None, max_positions=10,
+                  initial_cash=100_000.0, fractional=False):
+    # weights: {symbol: fraction of equity per entry}; default 1/max_positions each.
+    index, symbols, close = align_closes(bars)
+    entry, exit_ = STRATEGIES[strategy](close, **(params or {}))
+    w = np.full(len(symbols), 1.0 / max_positions)
+    for j, s in enumerate(symbols):
+        if weights and s in weights:
+            w[j] = weights[s]
+    sim = simulate(close, entry, exit_, w, initial_cash, fractional)
+    return portfolio_report(index, symbols, sim, initial_cash)
+
+
+def strategy_params(strategy, settings):
+    if strategy == "ma_rsi_combo":
+        keys = {"fast_ma": "fast_ma", "slow_ma": "slow_ma", "rsi_period": "rsi_period",
+                "rsi_buy": "rsi_buy", "rsi_sell": "rsi_sell"}
+    else:
+        keys = {"window": "bollinger_window", "std_dev": "bollinger_std_dev",
+                "rsi_thresh": "bollinger_rsi_thresh", "rsi_period": "rsi_period"}
+    return {arg: settings[key] for arg, key in keys.items() if key in settings}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Portfolio backtest over a symbol universe")
+    parser.add_argument("--symbols", nargs="+")
+    parser.add_argument("--symbols-file", help="one symbol per line")
+    parser.add_argument("--strategy", choices=list(STRATEGIES), default="ma_rsi_combo")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--cash", type=float, default=100_000.0)
+    parser.add_argument("--max-positions", type=int, default=10)
+    parser.add_argument("--fractional", action="store_true")
+    args = parser.parse_args()
+
+    settings = {}
+    if os.path.exists("settings.json"):
+        with open("settings.json", "r") as f:
+            settings = json.load(f)
+    symbols = args.symbols or settings.get("symbols", ["AAPL", "MSFT", "GOOGL"])
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            symbols = [line.strip().upper() for line in f if line.strip()]
+
+    print(f"📥 Loading {len(symbols)} symbols ({args.period}, {args.interval})...")
+    bars = get_bars_many(symbols, args.period, args.interval)
+    report = run_portfolio(bars, args.strategy, strategy_params(args.strategy, settings),
+                           max_positions=args.max_positions, initial_cash=args.cash, fractional=args.fractional)
+
+    print("\n📊 Portfolio Results")
+    print("------------------")
+    print(f"Final Equity: ${report['final_equity']:,.2f}")
+    print(f"Total Return: {report['total_return_pct']:.2f}%")
+    print(f"Max Drawdown: {report['max_drawdown_pct']:.2f}%")
+    print(f"Turnover: {report['turnover']:.2f}x ({report['annual_turnover']:.2f}x per year)")
+    print(f"Trades: {report['trades']}")
+    print("\nTop symbols by realized P/L:")
+    print(report["per_symbol_pl"].sort_values(ascending=False).head(10).round(2).to_string())
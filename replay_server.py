@@ -0,0 +1,85 @@
+# replay_server.py
+# Local stand-in for the Alpaca market-data WebSocket. Speaks the same msgpack
+# protocol as wss://stream.data.alpaca.markets/v2/<feed> and replays 1-minute
+# bars recorded by stream_feed.py (or any CSV with the same columns), so the
+# streaming bot can be exercised offline:
+#
+#   python replay_server.py --csv recorded_bars.csv --speed 0
+#   python bot_engine.py --stream --stream-url ws://localhost:8765
+
+import argparse
+import asyncio
+
+import msgpack
+import pandas as pd
+import websockets
+
+
+def load_bars(path, symbols=None):
+    bars = pd.read_csv(path)
+    bars["timestamp"] = pd.to_datetime(bars["timestamp"], utc=True)
+    if symbols:
+        bars = bars[bars["symbol"].isin(symbols)]
+    return bars.sort_values("timestamp", kind="stable")
+
+
+def _bar_message(row):
+    ts = row.timestamp
+    return {
+        "T": "b", "S": row.symbol,
+        "o": float(row.open), "h": float(row.high), "l": float(row.low), "c": float(row.close),
+        "v": int(row.volume),
+        "t": msgpack.Timestamp(ts.value // 10**9, ts.value % 10**9),
+    }
+
+
+class ReplayServer:
+    def __init__(self, bars, speed=0.0):
+        self.bars = bars
+        self.speed = speed
+
+    async def _expect(self, ws, action):
+        msg = msgpack.unpackb(await ws.recv())
+        if msg.get("action") != action:
+            raise ValueError(f"expected {action!r}, got {msg!r}")
+        return msg
+
+    async def handler(self, ws, path=None):
+        await ws.send(msgpack.packb([{"T": "success", "msg": "connected"}]))
+        await self._expect(ws, "auth")
+        await ws.send(msgpack.packb([{"T": "success", "msg": "authenticated"}]))
+        sub = await self._expect(ws, "subscribe")
+        wanted = set(sub.get("bars", []))
+        await ws.send(msgpack.packb([{"T": "subscription", "bars": sorted(wanted)}]))
+
+        bars = self.bars if "*" in wanted else self.bars[self.bars["symbol"].isin(wanted)]
+        prev_ts = None
+        # Bars sharing a timestamp go out in one frame, like the live feed.
+        for ts, group in bars.groupby("timestamp", sort=True):
+            if self.speed and prev_ts is not None:
+                await asyncio.sleep((ts - prev_ts).total_seconds() / self.speed)
+            prev_ts = ts
+            await ws.send(msgpack.packb([_bar_message(r) for r in group.itertuples()]))
+        print(f"✅ Replayed {len(bars)} bars.")
+        await ws.wait_closed()
+
+    async def serve(self, host="localhost", port=8765):
+        async with websockets.serve(self.handler, host, port):
+            print(f"🎞️ Replay server listening on ws://{host}:{port}")
+            await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded bars over the Alpaca data-stream protocol")
+    parser.add_argument("--csv", required=True, help="bars recorded by stream_feed.py")
+    parser.add_argument("--symbols", nargs="*")
+    parser.add_argument("--speed", type=float, default=0, help="replay speed multiple; 0 = as fast as possible")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ReplayServer(load_bars(args.csv, args.symbols), args.speed)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,144 @@
+# ring_buffer.py
+# Fixed-capacity bar buffers for live rolling windows. Each symbol keeps its
+# last `capacity` bars (int64 ns timestamps plus OHLCV) in preallocated NumPy
+# arrays; every bar is written twice, at i and i + capacity, so the newest n
+# bars are always one contiguous slice and windows are zero-copy views.
+# Memory is capacity x symbols, however long the bot has been running.
+
+import numpy as np
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+_COLUMN_INDEX = {name: k for k, name in enumerate(COLUMNS)}
+
+
+class SeriesView:
+    """One column of a window: `ts` (int64 ns UTC) and `values` (float64).
+
+    Both are read-only views into the ring; they stay valid until the ring
+    has wrapped past them, so consume them before the next append.
+    """
+
+    __slots__ = ("ts", "values")
+
+    def __init__(self, ts, values):
+        self.ts = ts
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def empty(self):
+        return not len(self.values)
+
+    def last(self):
+        return float(self.values[-1])
+
+
+class BarWindow:
+    # The newest bars of one symbol; window["Close"] -> SeriesView.
+    __slots__ = ("ts", "data")
+
+    def __init__(self, ts, data):
+        self.ts = ts
+        self.data = data  # (5, n) view, rows in COLUMNS order
+
+    def __getitem__(self, column):
+        return SeriesView(self.ts, self.data[_COLUMN_INDEX[column]])
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def empty(self):
+        return not len(self.ts)
+
+    def last_ts(self):
+        return int(self.ts[-1]) if len(self.ts) else None
+
+
+class BarRing:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = np.zeros(2 * capacity, dtype=np.int64)
+        self.data = np.zeros((len(COLUMNS), 2 * capacity), dtype=np.float64)
+        self.pos = 0  # next write slot in [0, capacity)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def last_ts(self):
+        return int(self.ts[self.pos - 1 + self.capacity]) if self.size else None
+
+    def append(self, ts, values):
+        # Bars must arrive in time order; a bar with the newest timestamp
+        # replaces it (a corrected bar), anything older is ignored.
+        last = self.last_ts()
+        if last is not None and ts <= last:
+            if ts < last:
+                return False
+            self.pos = (self.pos - 1) % self.capacity
+            self.size -= 1
+        k = self.pos
+        self.ts[k] = self.ts[k + self.capacity] = ts
+        self.data[:, k] = self.data[:, k + self.capacity] = values
+        self.pos = (k + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    def extend(self, ts, data):
+        # Bulk-load (n,) timestamps and (5, n) values, e.g. seeding history.
+        for k in range(max(0, len(ts) - self.capacity), len(ts)):
+            self.append(int(ts[k]), data[:, k])
+
+    def window(self, n=None):
+        # The newest min(n, size) bars, oldest first, as read-only views.
+        n = self.size if n is None else min(n, self.size)
+        end = self.pos + self.capacity
+        ts = self.ts[end - n:end]
+        data = self.data[:, end - n:end]
+        ts.flags.writeable = False
+        data.flags.writeable = False
+        return BarWindow(ts, data)
+
+    @property
+    def nbytes(self):
+        return self.ts.nbytes + self.data.nbytes
+
+
+class RingStore:
+    """{symbol: BarRing}, created on first use."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.rings = {}
+
+    def ring(self, symbol):
+        ring = self.rings.get(symbol)
+        if ring is None:
+            ring = self.rings[symbol] = BarRing(self.capacity)
+        return ring
+
+    def seed(self, symbol, frame):
+        # Load the tail of an OHLCV DataFrame (bar_store shape).
+        if frame is None or frame.empty:
+            return
+        ts = frame.index.as_unit("ns").asi8
+        data = np.vstack([frame[c].to_numpy(dtype=np.float64) if c in frame else np.full(len(frame), np.nan)
+                          for c in COLUMNS])
+        self.ring(symbol).extend(ts, data)
+
+    def append(self, symbol, ts, values):
+        return self.ring(symbol).append(ts, values)
+
+    def window(self, symbol, n=None):
+        return self.ring(symbol).window(n)
+
+    def last_ts(self, symbol):
+        ring = self.rings.get(symbol)
+        return ring.last_ts() if ring is not None else None
+
+    @property
+    def nbytes(self):
+        return sum(ring.nbytes for ring in self.rings.values())
@@ -0,0 +1,248 @@
+# robustness.py
+# Overfitting checks for the MA+RSI strategy. Walk-forward re-optimizes the
+# parameters on each rolling train window and scores the winner (and the
+# settings.json parameters) on the following unseen test window. Monte Carlo
+# resamples the backtest's trades and block-bootstraps the bar returns to
+# show the spread of outcomes luck alone could produce. Every window and
+# batch of simulations is an independent task on a process pool; the price
+# array lives in shared memory so workers read it without copying it.
+
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest_core import fill_metrics, long_flat_fills, ma_rsi_indicators, ma_rsi_masks
+from bar_store import get_bars
+from optimizer import SharedIndicators, grid_params, random_params
+
+TRAIN_BARS = 500
+TEST_BARS = 100
+MIN_TRAIN_TRADES = 3
+SIMS = 2000
+SIMS_PER_TASK = 250
+BLOCK_BARS = 20
+PARAM_KEYS = ["fast_ma", "slow_ma", "rsi_period", "rsi_buy", "rsi_sell"]
+DEFAULT_PARAMS = {"fast_ma": 5, "slow_ma": 20, "rsi_period": 14, "rsi_buy": 30, "rsi_sell": 70}
+
+
+# --- Shared Memory ---
+def share_array(array):
+    # Copy `array` into a new shared-memory block; returns (shm, spec). The
+    # caller owns the block and must close() and unlink() it.
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[:] = array
+    return shm, {"name": shm.name, "shape": array.shape, "dtype": array.dtype.str}
+
+
+_SHARED = {}
+
+
+def _init_worker(specs):
+    for key, spec in specs.items():
+        # Pool workers share the parent's resource tracker, so attaching
+        # here doesn't add a second owner; the parent unlinks the block.
+        shm = shared_memory.SharedMemory(name=spec["name"])
+        _SHARED[key] = (shm, np.ndarray(spec["shape"], spec["dtype"], buffer=shm.buf))
+
+
+def _shared(key):
+    return _SHARED[key][1]
+
+
+def _run_pool(specs, workers, tasks):
+    # tasks: [(fn, args), ...]; results come back in task order.
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(specs,)) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in tasks]
+        results = []
+        for done, future in enumerate(futures, 1):
+            results.append(future.result())
+            if done % 10 == 0 or done == len(futures):
+                print(f"⏳ {done}/{len(futures)} tasks done")
+    return results
+
+
+# --- Strategy Evaluation ---
+def _metrics(shared, params, start, stop):
+    # Fills only inside [start, stop) of the indicator arrays; the bars
+    # before `start` just warm the indicators up.
+    entry, exit_ = ma_rsi_masks(shared.ma(params["fast_ma"]), shared.ma(params["slow_ma"]),
+                                shared.rsi(params["rsi_period"]), params["rsi_buy"], params["rsi_sell"])
+    fills = long_flat_fills(entry[start:stop], exit_[start:stop])
+    return fill_metrics(shared.close.to_numpy()[start:stop], fills)
+
+
+def walk_forward_window(train_start, train_stop, test_stop, combos, current):
+    close = pd.Series(_shared("close")[train_start:test_stop])
+    shared = SharedIndicators(close)
+    train_len = train_stop - train_start
+    best, best_metrics = None, None
+    for params in combos:
+        m = _metrics(shared, params, 0, train_len)
+        if m["total_trades"] >= MIN_TRAIN_TRADES and (best is None or m["return_pct"] > best_metrics["return_pct"]):
+            best, best_metrics = params, m
+    row = {"train_start": train_start, "test_start": train_stop, "test_stop": test_stop}
+    current_test = _metrics(shared, current, train_len, len(close))
+    row.update({"settings_is_return_pct": _metrics(shared, current, 0, train_len)["return_pct"],
+                "settings_oos_return_pct": current_test["return_pct"],
+                "settings_oos_trades": current_test["total_trades"]})
+    if best is None:
+        return row
+    test = _metrics(shared, best, train_len, len(close))
+    row.update({**best, "is_return_pct": best_metrics["return_pct"], "is_trades": best_metrics["total_trades"],
+                "oos_return_pct": test["return_pct"], "oos_trades": test["total_trades"],
+                "oos_win_rate": test["win_rate"]})
+    return row
+
+
+def bootstrap_trades(trade_returns, n_sims, seed):
+    # Resample the trade list with replacement; compounded total return and
+    # max drawdown (both %) per simulation.
+    rng = np.random.default_rng(seed)
+    picks = trade_returns[rng.integers(0, len(trade_returns), (n_sims, len(trade_returns)))]
+    equity = np.cumprod(1 + picks, axis=1)
+    drawdown = (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1)
+    return (equity[:, -1] - 1) * 100, np.minimum(drawdown, 0) * 100
+
+
+def block_bootstrap(n_sims, block, params, seed):
+    # Rebuild price paths from randomly drawn blocks of the real log returns
+    # and run the strategy on each; returns (return_pct, trades) arrays.
+    close = _shared("close")
+    returns = np.diff(np.log(close))
+    rng = np.random.default_rng(seed)
+    n_blocks = math.ceil(len(returns) / block)
+    out_return, out_trades = np.empty(n_sims), np.empty(n_sims, dtype=np.int64)
+    for k in range(n_sims):
+        starts = rng.integers(0, len(returns) - block + 1, n_blocks)
+        path = returns[(starts[:, None] + np.arange(block)).ravel()[:len(returns)]]
+        prices = close[0] * np.exp(np.concatenate([[0.0], np.cumsum(path)]))
+        ind = ma_rsi_indicators(pd.Series(prices), params["fast_ma"], params["slow_ma"], params["rsi_period"])
+        entry, exit_ = ma_rsi_masks(ind["Fast_MA"], ind["Slow_MA"], ind["RSI"], params["rsi_buy"], params["rsi_sell"])
+        m = fill_metrics(prices, long_flat_fills(entry, exit_))
+        out_return[k], out_trades[k] = m["return_pct"], m["total_trades"]
+    return out_return, out_trades
+
+
+# --- Runners ---
+def walk_forward(close, combos, current, train_bars=TRAIN_BARS, test_bars=TEST_BARS, step=None, workers=None):
+    """Rolling train/test evaluation; one row per window.
+
+    Each row has the window bounds (bar positions), the parameters chosen on
+    the train window with their in-sample and out-of-sample return, and the
+    same two numbers for the `current` (settings.json) parameters.
+    """
+    step = step or test_bars
+    windows = [(s, s + train_bars, s + train_bars + test_bars)
+               for s in range(0, len(close) - train_bars - test_bars + 1, step)]
+    if not windows:
+        raise ValueError(f"Need at least {train_bars + test_bars} bars, have {len(close)}")
+    shm, spec = share_array(np.asarray(close, dtype=np.float64))
+    try:
+        rows = _run_pool({"close": spec}, workers,
+                         [(walk_forward_window, (*w, combos, current)) for w in windows])
+    finally:
+        shm.close()
+        shm.unlink()
+    return pd.DataFrame(rows)
+
+
+def monte_carlo(close, params, sims=SIMS, block=BLOCK_BARS, workers=None, seed=0, sims_per_task=SIMS_PER_TASK):
+    """Trade-resampling and block-bootstrap distributions for `params`.
+
+    Returns {"trades": DataFrame(total_return_pct, max_drawdown_pct),
+    "paths": DataFrame(return_pct, trades)}; "trades" is empty when the
+    backtest has no closed trades to resample.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    ind = ma_rsi_indicators(pd.Series(close), params["fast_ma"], params["slow_ma"], params["rsi_period"])
+    entry, exit_ = ma_rsi_masks(ind["Fast_MA"], ind["Slow_MA"], ind["RSI"], params["rsi_buy"], params["rsi_sell"])
+    fills = long_flat_fills(entry, exit_)
+    n = len(fills) // 2 * 2
+    trade_returns = close[fills[1:n:2]] / close[fills[0:n:2]] - 1
+
+    batches = [min(sims_per_task, sims - k) for k in range(0, sims, sims_per_task)]
+    seeds = np.random.SeedSequence(seed).spawn(2 * len(batches))
+    tasks = [(block_bootstrap, (size, block, params, seeds[k])) for k, size in enumerate(batches)]
+    if len(trade_returns):
+        tasks += [(bootstrap_trades, (trade_returns, size, seeds[len(batches) + k])) for k, size in enumerate(batches)]
+
+    shm, spec = share_array(close)
+    try:
+        results = _run_pool({"close": spec}, workers, tasks)
+    finally:
+        shm.close()
+        shm.unlink()
+    paths = results[:len(batches)]
+    trades = results[len(batches):]
+    return {
+        "paths": pd.DataFrame({"return_pct": np.concatenate([r for r, _ in paths]),
+                               "trades": np.concatenate([t for _, t in paths])}),
+        "trades": pd.DataFrame({"total_return_pct": np.concatenate([r for r, _ in trades]),
+                                "max_drawdown_pct": np.concatenate([d for _, d in trades])})
+        if trades else pd.DataFrame(),
+    }
+
+
+def summarize(values):
+    values = np.asarray(values, dtype=float)
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {"mean": values.mean(), "p5": p5, "p50": p50, "p95": p95, "prob_loss": (values < 0).mean() * 100}
+
+
+def load_params(path="settings.json"):
+    params = dict(DEFAULT_PARAMS)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            settings = json.load(f)
+        params.update({k: settings[k] for k in PARAM_KEYS if k in settings})
+    return params
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward and Monte Carlo checks for MA + RSI")
+    parser.add_argument("--symbol", default="AAPL")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--mode", choices=["walk-forward", "monte-carlo", "both"], default="both")
+    parser.add_argument("--train", type=int, default=TRAIN_BARS, help="bars per train window")
+    parser.add_argument("--test", type=int, default=TEST_BARS, help="bars per test window")
+    parser.add_argument("--samples", type=int, default=None, help="random combinations per window (default: full grid)")
+    parser.add_argument("--sims", type=int, default=SIMS)
+    parser.add_argument("--block", type=int, default=BLOCK_BARS, help="bars per bootstrap block")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    params = load_params()
+    print(f"📥 Loading {args.symbol} ({args.period}, {args.interval})...")
+    close = get_bars(args.symbol, args.period, args.interval)["Close"].dropna().to_numpy(dtype=float)
+
+    if args.mode in ("walk-forward", "both"):
+        combos = grid_params() if args.samples is None else random_params(args.samples, seed=args.seed)
+        print(f"\n🚶 Walk-forward: {args.train}/{args.test} bars, {len(combos)} combinations per window")
+        wf = walk_forward(close, combos, params, args.train, args.test, workers=args.workers)
+        print(wf.round(2).to_string(index=False))
+        if "oos_return_pct" in wf:
+            is_total, oos_total = wf["is_return_pct"].sum(), wf["oos_return_pct"].sum()
+            # Train windows are longer than test windows; compare per bar.
+            efficiency = (oos_total / args.test) / (is_total / args.train) if is_total > 0 else float("nan")
+            print(f"\nRe-optimized OOS return: {oos_total:.2f}% (walk-forward efficiency {efficiency:.2f})")
+        print(f"settings.json IS return: {wf['settings_is_return_pct'].sum():.2f}%, "
+              f"OOS return: {wf['settings_oos_return_pct'].sum():.2f}%")
+
+    if args.mode in ("monte-carlo", "both"):
+        print(f"\n🎲 Monte Carlo: {args.sims} simulations, {args.block}-bar blocks")
+        mc = monte_carlo(close, params, args.sims, args.block, args.workers, args.seed)
+        for label, frame in (("Block-bootstrapped paths", mc["paths"]), ("Resampled trades", mc["trades"])):
+            if frame.empty:
+                print(f"\n{label}: no closed trades to resample.")
+                continue
+            print(f"\n{label}")
+            print(pd.DataFrame({col: summarize(frame[col]) for col in frame}).round(2).to_string())
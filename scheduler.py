@@ -0,0 +1,74 @@
+# scheduler.py
+# Market-hours helpers and a bar-close scheduler for the long-running bot.
+
+import threading
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+# Standard library only: bot_engine.py checks market hours before it loads
+# anything heavy.
+EASTERN = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+# Long sleeps are taken in slices so clock jumps (suspend, NTP) are noticed.
+MAX_SLEEP_SLICE = 300
+
+
+# --- Market Hours Check ---
+def is_market_open(now=None):
+    now = now or datetime.now(EASTERN)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+def _at(day, clock):
+    return datetime.combine(day, clock, tzinfo=EASTERN)
+
+
+def next_session_open(now):
+    # Next regular-session open strictly after `now` (weekends skipped).
+    day = now.date()
+    while True:
+        open_at = _at(day, MARKET_OPEN)
+        if day.weekday() < 5 and open_at > now:
+            return open_at
+        day += timedelta(days=1)
+
+
+# --- Scheduler ---
+class BarScheduler:
+    # Wakes the bot a few seconds after each bar close inside the session and
+    # sleeps straight through to the first bar of the next session otherwise.
+    def __init__(self, interval_minutes=15, settle_seconds=10):
+        self.interval = timedelta(minutes=interval_minutes)
+        self.settle = timedelta(seconds=settle_seconds)
+        self._stop = threading.Event()
+
+    def next_run(self, now=None):
+        now = now or datetime.now(EASTERN)
+        day_open = _at(now.date(), MARKET_OPEN)
+        day_close = _at(now.date(), MARKET_CLOSE)
+        if now.weekday() < 5 and now < day_close + self.settle:
+            # Bars close on the interval grid measured from the open.
+            elapsed = max(now - self.settle - day_open, timedelta(0))
+            bars_done = elapsed // self.interval
+            bar_close = day_open + (bars_done + 1) * self.interval
+            if bar_close <= day_close:
+                return bar_close + self.settle
+        return next_session_open(now) + self.interval + self.settle
+
+    def sleep_until(self, when):
+        # Returns True if stop() was called before `when` was reached.
+        while not self._stop.is_set():
+            remaining = (when - datetime.now(EASTERN)).total_seconds()
+            if remaining <= 0:
+                return False
+            self._stop.wait(min(remaining, MAX_SLEEP_SLICE))
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
@@ -0,0 +1,315 @@
+# strategies.py
+# Strategy registry and shared indicator graph for the bot. Each strategy
+# declares the bars it reads and the indicators it needs (e.g. ("rsi", 14));
+# the engine merges the declarations of every active strategy, fetches each
+# bar set once and advances each distinct (series, indicator) node once per
+# cycle, so strategies running side by side share data and compute.
+
+import numpy as np
+import pandas as pd
+
+from bar_store import get_bars_many
+from execution import _print_log
+from indicators import RollingMean, RollingRSI, RollingStd, ZScore
+from metrics import span
+from ring_buffer import SeriesView
+
+# Indicator name -> incremental state class from indicators.py. A spec is
+# (name, *params), e.g. ("sma", 20) or ("rsi", 14).
+INDICATORS = {
+    "sma": RollingMean,
+    "std": RollingStd,  # peek/value give (mean, std)
+    "rsi": RollingRSI,
+    "zscore": ZScore,
+}
+
+STRATEGIES = {}
+
+
+def register(cls):
+    STRATEGIES[cls.name] = cls
+    return cls
+
+
+def spec_key(spec):
+    return f"{spec[0]}({','.join(str(p) for p in spec[1:])})"
+
+
+def active_strategies(settings):
+    # "strategies": [...] runs several side by side; "strategy" is the
+    # single-strategy setting the dashboard has always written.
+    names = settings.get("strategies") or [settings.get("strategy", "ma_rsi_combo")]
+    unknown = [n for n in names if n not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown strategies: {', '.join(unknown)}")
+    return names
+
+
+# --- Strategies ---
+class Strategy:
+    name = None
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def bars(self):
+        # (period, interval) passed to bar_store.
+        return "5d", "15m"
+
+    def symbols(self, universe):
+        return list(universe)
+
+    def sources(self, bars, universe):
+        # {source name: close-like series} the indicators run on. `bars` holds
+        # DataFrames or ring_buffer.BarWindows; both index by column name.
+        return {s: bars[s]["Close"] for s in self.symbols(universe) if s in bars and not bars[s].empty}
+
+    def legs(self, source):
+        # Symbols whose bars feed `source`.
+        return [source]
+
+    def indicators(self):
+        # {role: spec}
+        raise NotImplementedError
+
+    def lookback(self):
+        # Longest indicator window, in bars.
+        return max(max(spec[1:]) for spec in self.indicators().values())
+
+    def decide(self, source, ind, price):
+        # Signal for one source given its indicator states (`.value` = last
+        # closed bar, `.peek(price)` = the forming bar).
+        raise NotImplementedError
+
+    def orders(self, source, signal, log):
+        log(f"{source} signal: {signal}", symbol=source)
+        return [(source, signal)] if signal else []
+
+
+@register
+class MaRsiCombo(Strategy):
+    name = "ma_rsi_combo"
+
+    def indicators(self):
+        s = self.settings
+        return {"fast": ("sma", s.get("fast_ma", 5)),
+                "slow": ("sma", s.get("slow_ma", 20)),
+                "rsi": ("rsi", s.get("rsi_period", 14))}
+
+    def decide(self, source, ind, price):
+        fast_prev = ind["fast"].value
+        slow_prev = ind["slow"].value
+        rsi_now = ind["rsi"].peek(price)
+        if fast_prev > slow_prev and rsi_now < self.settings.get("rsi_buy", 30):
+            return "buy"
+        elif fast_prev < slow_prev and rsi_now > self.settings.get("rsi_sell", 70):
+            return "sell"
+        return None
+
+
+@register
+class BollingerRsi(Strategy):
+    name = "bollinger_rsi"
+
+    def indicators(self):
+        s = self.settings
+        return {"band": ("std", s.get("bollinger_window", 20)),
+                "rsi": ("rsi", s.get("rsi_period", 14))}
+
+    def decide(self, source, ind, price):
+        std_dev = self.settings.get("bollinger_std_dev", 2)
+        rsi_thresh = self.settings.get("bollinger_rsi_thresh", 35)
+        ma, std = ind["band"].peek(price)
+        rsi_now = ind["rsi"].peek(price)
+        if price < ma - std_dev * std and rsi_now < rsi_thresh:
+            return "buy"
+        elif price > ma + std_dev * std and rsi_now > 100 - rsi_thresh:
+            return "sell"
+        return None
+
+
+@register
+class PairsZscore(Strategy):
+    name = "pairs_zscore"
+
+    @property
+    def pairs(self):
+        return self.settings.get("pairs", {})
+
+    def bars(self):
+        return f"{self.pairs.get('lookback_days', 15) + 5}d", "1h"
+
+    def pair_list(self):
+        # {source: (symbol_y, symbol_x, hedge_ratio)} for the pairs scanner's
+        # candidates, else the single configured pair (raw price difference).
+        candidates = self.pairs.get("candidates") or [
+            {"symbols": self.pairs.get("symbols", ["AAPL", "MSFT"]), "hedge_ratio": self.pairs.get("hedge_ratio", 1.0)}
+        ]
+        pairs = {}
+        for c in candidates:
+            (y, x), hedge = c["symbols"], c.get("hedge_ratio", 1.0)
+            pairs[f"{y}-{x}" if hedge == 1 else f"{y}-{hedge:g}*{x}"] = (y, x, hedge)
+        return pairs
+
+    def symbols(self, universe):
+        legs = []
+        for y, x, _ in self.pair_list().values():
+            legs += [s for s in (y, x) if s not in legs]
+        return legs
+
+    def legs(self, source):
+        return self.pair_list()[source][:2]
+
+    def sources(self, bars, universe):
+        spreads = {}
+        for source, (y, x, hedge) in self.pair_list().items():
+            if y not in bars or x not in bars:
+                continue
+            y_close, x_close = bars[y]["Close"], bars[x]["Close"]
+            if isinstance(y_close, SeriesView):
+                # Ring-buffer windows: align the legs on their timestamps.
+                ts, iy, ix = np.intersect1d(y_close.ts, x_close.ts, assume_unique=True, return_indices=True)
+                spread = y_close.values[iy] - hedge * x_close.values[ix]
+                ok = ~np.isnan(spread)
+                if ok.any():
+                    spreads[source] = SeriesView(ts[ok], spread[ok])
+                continue
+            df = pd.DataFrame({"y": y_close, "x": x_close}).dropna()
+            if not df.empty:
+                spreads[source] = df["y"] - hedge * df["x"]
+        return spreads
+
+    def indicators(self):
+        return {"z": ("zscore", self.pairs.get("lookback_days", 15))}
+
+    def decide(self, source, ind, price):
+        first, second = self.legs(source)
+        z_now = ind["z"].peek(price)
+        if z_now > self.pairs.get("entry_zscore", 2.0):
+            return first, "sell", second, "buy"
+        elif z_now < -self.pairs.get("entry_zscore", 2.0):
+            return first, "buy", second, "sell"
+        elif abs(z_now) < self.pairs.get("exit_zscore", 0.5):
+            return "exit"
+        return None
+
+    def orders(self, source, signal, log):
+        if signal == "exit":
+            log("Z-score exited. No action.")
+        elif signal:
+            sym1, act1, sym2, act2 = signal
+            log(f"Pairs signal: {sym1}-{act1}, {sym2}-{act2}")
+            # Both legs in one batch so they hit the API together.
+            return [(sym1, act1), (sym2, act2)]
+        return []
+
+
+# --- Engine ---
+class StrategyEngine:
+    """Runs a set of registered strategies over one cycle of bars.
+
+    Indicator state lives in an IndicatorStore under
+    "<interval>:<source>:<indicator>", e.g. "15m:AAPL:rsi(14)", so the same
+    indicator on the same series is stored and advanced once no matter how
+    many strategies read it.
+    """
+
+    def __init__(self, store, log=_print_log, fetch=get_bars_many):
+        self.store = store
+        self.log = log
+        self.fetch = fetch
+        self.last_graph = {}
+
+    def bar_requests(self, strategies, universe, wanted=None):
+        # {(period, interval): [symbols]} the strategies read; pass `wanted`
+        # to merge into an existing request set.
+        wanted = {} if wanted is None else wanted
+        for strategy in strategies:
+            symbols = wanted.setdefault(strategy.bars(), [])
+            symbols.extend(s for s in strategy.symbols(universe) if s not in symbols)
+        return wanted
+
+    def load_bars(self, strategies, universe):
+        # One batched download per (period, interval) across all strategies.
+        wanted = self.bar_requests(strategies, universe)
+        return {key: self.fetch(symbols, *key) for key, symbols in wanted.items()}
+
+    def build_graph(self, inputs):
+        # {(interval, source, spec): series}; duplicates collapse here.
+        graph = {}
+        for strategy, sources in inputs:
+            interval = strategy.bars()[1]
+            for source, series in sources.items():
+                for spec in strategy.indicators().values():
+                    graph.setdefault((interval, source, spec), series)
+        return graph
+
+    def compute(self, graph):
+        return {
+            node: self.store.sync(f"{node[0]}:{node[1]}:{spec_key(node[2])}", INDICATORS[node[2][0]],
+                                  node[2][1:], series)
+            for node, series in graph.items()
+        }
+
+    def evaluate(self, names, settings, universe, bars=None, trigger=None):
+        """Return the cycle's orders [(symbol, side), ...] for the named strategies.
+
+        `bars` ({symbol: frame}) skips downloading, e.g. for streamed bars;
+        it is used for every strategy's bar set. With `trigger`, only sources
+        reading that symbol are evaluated (the symbol whose bar just closed).
+        """
+        strategies = [STRATEGIES[name](settings) for name in names]
+        if bars is None:
+            with span("fetch"):
+                by_key = self.load_bars(strategies, universe)
+        else:
+            by_key = {s.bars(): bars for s in strategies}
+        inputs = []
+        for s in strategies:
+            sources = s.sources(by_key[s.bars()], universe)
+            if trigger is not None:
+                sources = {name: series for name, series in sources.items() if trigger in s.legs(name)}
+            inputs.append((s, sources))
+        graph = self.build_graph(inputs)
+        with span("indicators"):
+            states = self.compute(graph)
+        self.last_graph = graph
+        uses = sum(len(sources) * len(s.indicators()) for s, sources in inputs)
+        self.log(f"Indicator graph: {len(graph)} nodes for {uses} strategy inputs.", level="DEBUG")
+
+        orders = []
+        with span("signals"):
+            for strategy, sources in inputs:
+                interval = strategy.bars()[1]
+                specs = strategy.indicators()
+                for source, series in sources.items():
+                    ind = {role: states[(interval, source, spec)] for role, spec in specs.items()}
+                    signal = strategy.decide(source, ind, float(series.values[-1]))
+                    # Orders from one decision (e.g. both pair legs) share a group.
+                    group = (strategy.name, source)
+                    orders.extend((symbol, side, group) for symbol, side in strategy.orders(source, signal, self.log))
+        return merge_orders(orders, self.log)
+
+
+def merge_orders(orders, log=_print_log):
+    # Several strategies may agree on a symbol (sent once) or disagree (sent
+    # neither way). Orders may carry a third field, a group id: a group with
+    # any conflicting leg is dropped whole, so a pair never goes out one-legged.
+    sides = {}
+    for symbol, side, *_ in orders:
+        sides.setdefault(symbol, set()).add(side)
+    conflicts = {symbol for symbol, seen in sides.items() if len(seen) > 1}
+    for symbol in conflicts:
+        log(f"Conflicting signals for {symbol}; skipping.", level="WARNING", symbol=symbol)
+    dropped = {order[2] for order in orders if len(order) > 2 and order[0] in conflicts}
+    for group in dropped:
+        legs = sorted({order[0] for order in orders if len(order) > 2 and order[2] == group} - conflicts)
+        if legs:
+            log(f"Dropping {', '.join(legs)}: grouped with a conflicting leg.", level="WARNING")
+    merged, sent = [], set()
+    for symbol, side, *group in orders:
+        if symbol in conflicts or symbol in sent or (group and group[0] in dropped):
+            continue
+        merged.append((symbol, side))
+        sent.add(symbol)
+    return merged
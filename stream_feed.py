@@ -0,0 +1,150 @@
+# stream_feed.py
+# Streaming bar ingestion from the Alpaca market-data WebSocket. One-minute
+# bars are assembled in memory into the strategy interval and each completed
+# bar is pushed to a callback together with that symbol's recent history,
+# instead of re-downloading the whole window from yfinance every cycle. The
+# history lives in fixed-size ring buffers (ring_buffer.py), so no DataFrame
+# is built per bar.
+
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from ring_buffer import RingStore
+
+EASTERN = "America/New_York"
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+ONE_MINUTE = pd.Timedelta(minutes=1)
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+DEFAULT_CAPACITY = 1000
+
+
+# --- Bar Aggregation ---
+class BarAggregator:
+    # Folds 1-minute bars into `interval_minutes` bars on the same grid as
+    # yfinance (anchored at the 09:30 open), emitting each bar as soon as its
+    # last minute arrives.
+    def __init__(self, interval_minutes, on_bar):
+        self.interval = pd.Timedelta(minutes=interval_minutes)
+        self.on_bar = on_bar
+        self.partial = {}
+
+    def _bucket(self, ts):
+        origin = ts.normalize() + SESSION_OPEN
+        return origin + ((ts - origin) // self.interval) * self.interval
+
+    def add(self, symbol, ts, o, h, l, c, v):
+        ts = ts.tz_convert(EASTERN)
+        start = self._bucket(ts)
+        bar = self.partial.get(symbol)
+        if bar is not None and bar["start"] != start:
+            # A minute was missed at the end of the previous bar; close it now.
+            self._emit(symbol)
+            bar = None
+        if bar is None:
+            bar = {"start": start, "Open": o, "High": h, "Low": l, "Close": c, "Volume": v}
+            self.partial[symbol] = bar
+        else:
+            bar["High"] = max(bar["High"], h)
+            bar["Low"] = min(bar["Low"], l)
+            bar["Close"] = c
+            bar["Volume"] += v
+        if ts + ONE_MINUTE >= start + self.interval:
+            self._emit(symbol)
+
+    def _emit(self, symbol):
+        bar = self.partial.pop(symbol)
+        self.on_bar(symbol, bar["start"], [bar[c] for c in COLUMNS])
+
+    def flush(self):
+        for symbol in list(self.partial):
+            self._emit(symbol)
+
+    def discard(self):
+        # Drop the bars still forming, e.g. on shutdown; returns their symbols.
+        symbols = sorted(self.partial)
+        self.partial.clear()
+        return symbols
+
+
+def bars_at(rings, symbols, symbol, window):
+    # The bars to evaluate when `symbol` closes `window`: other symbols are
+    # included once they have closed the same bar, so a pair is evaluated
+    # once, when the second of its legs closes.
+    bars = {s: rings.window(s) for s in symbols if rings.last_ts(s) == window.last_ts()}
+    bars[symbol] = window
+    return bars
+
+
+# --- Streaming Feed ---
+class StreamingFeed:
+    # on_bar(symbol, window) runs on a single worker thread, in bar order, so
+    # strategies and order submission never block the WebSocket reader.
+    # `window` is a ring_buffer.BarWindow of the symbol's newest `capacity`
+    # bars; it and feed.rings windows are views, valid until the next bar.
+    def __init__(self, symbols, interval_minutes, on_bar, history=None, capacity=DEFAULT_CAPACITY, record_path=None,
+                 rings=None):
+        self.symbols = list(symbols)
+        self.on_bar = on_bar
+        self.record_path = record_path
+        # Pass `rings` to start from already-filled buffers (e.g. recovered
+        # from the journal); `history` frames are seeded on top.
+        self.rings = rings or RingStore(capacity)
+        for s in self.symbols:
+            self.rings.seed(s, (history or {}).get(s))
+        self.aggregator = BarAggregator(interval_minutes, self._on_complete)
+        self.stream = None
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="strategy")
+
+    def _on_complete(self, symbol, start, values):
+        # Rings are written on the worker thread, so a window handed to
+        # on_bar is never overwritten while it is being read.
+        self._worker.submit(self._dispatch, symbol, start.value, values)
+
+    def _dispatch(self, symbol, ts, values):
+        try:
+            if self.rings.append(symbol, ts, values):
+                self.on_bar(symbol, self.rings.window(symbol))
+        except Exception as e:
+            print(f"Streaming handler error for {symbol}: {e}")
+
+    def _record(self, symbol, ts, values):
+        new_file = not os.path.exists(self.record_path)
+        with open(self.record_path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["symbol", "timestamp"] + [c.lower() for c in COLUMNS])
+            writer.writerow([symbol, ts.isoformat()] + list(values))
+
+    async def handle_bar(self, bar):
+        ts = pd.Timestamp(bar.timestamp, tz="UTC")
+        values = (bar.open, bar.high, bar.low, bar.close, bar.volume)
+        if self.record_path:
+            self._record(bar.symbol, ts, values)
+        self.aggregator.add(bar.symbol, ts, *values)
+
+    def run(self, key_id, secret_key, base_url, data_stream_url=None, feed="iex", on_trade_update=None):
+        # Blocks until stop() is called. Point data_stream_url at
+        # replay_server.py to run against recorded bars. on_trade_update
+        # (async) also subscribes to order events on the same connection set.
+        from alpaca_trade_api.stream import Stream
+
+        self.stream = Stream(key_id, secret_key, base_url, data_stream_url=data_stream_url, data_feed=feed)
+        self.stream.subscribe_bars(self.handle_bar, *self.symbols)
+        if on_trade_update:
+            self.stream.subscribe_trade_updates(on_trade_update)
+        try:
+            self.stream.run()
+        finally:
+            # A half-built bar never reaches the strategies, the rings or the
+            # journal; the next session rebuilds it from history.
+            dropped = self.aggregator.discard()
+            if dropped:
+                print(f"Discarded forming bars for {', '.join(dropped)} on shutdown.")
+            self._worker.shutdown(wait=True)
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from backtest_core import backtest_ma_rsi, ma_rsi_indicators, ma_rsi_signal_masks, simulate_execution
+
+PARAMS = [(5, 20, 14, 30, 70), (5, 20, 14, 55, 70), (3, 10, 7, 45, 55), (8, 30, 21, 60, 65)]
+
+
+def make_bars(n=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    index = pd.date_range("2024-01-02 09:30", periods=n, freq="h", tz="America/New_York")
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000}, index=index)
+
+
+# --- Reference: the original row loops ---
+def legacy_backtest(data, fast_ma, slow_ma, rsi_period, rsi_buy, rsi_sell):
+    data = data.copy()
+    data["Fast_MA"] = data["Close"].rolling(fast_ma).mean()
+    data["Slow_MA"] = data["Close"].rolling(slow_ma).mean()
+    delta = data["Close"].diff()
+    gain = delta.where(delta > 0, 0).rolling(rsi_period).mean()
+    loss = -delta.where(delta < 0, 0).rolling(rsi_period).mean()
+    rs = gain / loss
+    data["RSI"] = 100 - (100 / (1 + rs))
+
+    position = None
+    entry_price = 0
+    trades = []
+    for i in range(1, len(data)):
+        row = data.iloc[i]
+        prev = data.iloc[i-1]
+        if position is None:
+            if (
+                prev["Fast_MA"] < prev["Slow_MA"] and row["Fast_MA"] > row["Slow_MA"]
+                and row["RSI"] < rsi_buy
+            ):
+                position = "long"
+                entry_price = row["Close"]
+                trades.append({"Date": row.name, "Action": "Buy", "Price": row["Close"]})
+        elif position == "long":
+            if (
+                prev["Fast_MA"] > prev["Slow_MA"] and row["Fast_MA"] < row["Slow_MA"]
+                or row["RSI"] > rsi_sell
+            ):
+                profit = row["Close"] - entry_price
+                trades.append({"Date": row.name, "Action": "Sell", "Price": row["Close"], "Profit": profit})
+                position = None
+    return trades
+
+
+def legacy_signals(data, fast_ma, slow_ma, rsi_period, rsi_buy, rsi_sell):
+    data = data.copy()
+    data["Fast_MA"] = data["Close"].rolling(window=fast_ma).mean()
+    data["Slow_MA"] = data["Close"].rolling(window=slow_ma).mean()
+    delta = data["Close"].diff()
+    gain = delta.where(delta > 0, 0).rolling(rsi_period).mean()
+    loss = -delta.where(delta < 0, 0).rolling(rsi_period).mean()
+    rs = gain / loss
+    data["RSI"] = 100 - (100 / (1 + rs))
+
+    trades = []
+    for i in range(1, len(data)):
+        prev = data.iloc[i - 1]
+        row = data.iloc[i]
+        if float(prev["Fast_MA"]) > float(prev["Slow_MA"]) and float(row["RSI"]) < rsi_buy:
+            trades.append({"Type": "Buy", "Date": row.name, "Price": float(row["Close"])})
+        elif float(prev["Fast_MA"]) < float(prev["Slow_MA"]) and float(row["RSI"]) > rsi_sell:
+            trades.append({"Type": "Sell", "Date": row.name, "Price": float(row["Close"])})
+    return trades
+
+
+# --- Parity Checks ---
+def test_backtest_matches_row_loop():
+    data = make_bars()
+    for params in PARAMS:
+        expected = legacy_backtest(data, *params)
+        trades, metrics, _ = backtest_ma_rsi(data, *params)
+        assert trades == expected, params
+
+        profits = pd.DataFrame(expected).query("Action == 'Sell'")["Profit"] if expected else pd.Series(dtype=float)
+        assert metrics["total_trades"] == len(profits)
+        assert np.isclose(metrics["total_profit"], profits.sum())
+        win_rate = (profits > 0).sum() / len(profits) * 100 if len(profits) else 0
+        assert np.isclose(metrics["win_rate"], win_rate)
+
+
+def test_signal_masks_match_dashboard_loop():
+    data = make_bars(seed=11)
+    for params in PARAMS:
+        fast_ma, slow_ma, rsi_period, rsi_buy, rsi_sell = params
+        ind = ma_rsi_indicators(data["Close"], fast_ma, slow_ma, rsi_period)
+        buy, sell = ma_rsi_signal_masks(ind["Fast_MA"], ind["Slow_MA"], ind["RSI"], rsi_buy, rsi_sell)
+        trades = [
+            {"Type": "Buy" if buy[i] else "Sell", "Date": data.index[i], "Price": float(data["Close"].iloc[i])}
+            for i in np.flatnonzero(buy | sell)
+        ]
+        assert trades == legacy_signals(data, *params), params
+
+
+def test_close_fills_without_costs_match_backtest():
+    # The execution simulator reduces to the plain backtest when it fills at
+    # the signal close with no spread, slippage or commission.
+    data = make_bars(seed=3)
+    for params in PARAMS:
+        expected, _, _ = backtest_ma_rsi(data, *params)
+        trades, _, _ = backtest_ma_rsi(data, *params, execution={"fill_at": "close"})
+        assert trades == expected, params
+
+
+def test_limit_orders_fill_against_high_low():
+    close = np.array([100.0, 100.0, 100.0, 100.0, 100.0, 100.0])
+    low = np.array([99.5, 99.5, 98.5, 99.5, 99.5, 99.5])
+    high = np.array([100.5, 100.5, 100.5, 100.5, 102.5, 100.5])
+    entry = np.array([True, False, False, False, False, False])
+    exit_ = np.array([False, False, False, True, False, False])
+    fills, prices = simulate_execution(close, high, low, close, entry, exit_, order_type="limit",
+                                       limit_offset_bps=100, limit_ttl_bars=2)
+    # Buy limit 99 rests on bars 1-2 and fills on bar 2's low; sell limit 101
+    # from bar 3's signal fills on bar 4's high.
+    assert fills.tolist() == [2, 4]
+    assert np.allclose(prices, [99.0, 101.0])
+
+    fills, _ = simulate_execution(close, high, low, close, entry, exit_, order_type="limit",
+                                  limit_offset_bps=100, limit_ttl_bars=1)
+    assert fills.tolist() == []
+
+
+if __name__ == "__main__":
+    test_backtest_matches_row_loop()
+    test_signal_masks_match_dashboard_loop()
+    test_close_fills_without_costs_match_backtest()
+    test_limit_orders_fill_against_high_low()
+    print("✅ Vectorized backtest matches the row loops.")
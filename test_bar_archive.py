@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from bar_archive import BarArchive, import_file
+
+
+def test_import_offset_stamped_csv_across_dst(tmp_path):
+    # Hourly bars over the March 2024 DST change, written the way
+    # get_bars(...).to_csv() writes them: -05:00 rows, then -04:00 rows.
+    index = pd.date_range("2024-03-08 09:30", "2024-03-12 15:30", freq="h", tz="America/New_York")
+    close = np.arange(len(index), dtype=float) + 100
+    path = str(tmp_path / "aapl.csv")
+    pd.DataFrame({c: close for c in ["Open", "High", "Low", "Close", "Volume"]}, index=index).rename_axis(
+        "Datetime").to_csv(path)
+    assert "-05:00" in open(path).read() and "-04:00" in open(path).read()
+
+    archive = BarArchive(str(tmp_path / "archive"))
+    assert import_file(path, "1h", symbol="AAPL", archive=archive, tz="America/New_York") == {"AAPL": len(index)}
+    frame = archive.open("AAPL", "1h").frame()
+    assert frame.index.equals(index)
+    assert (frame["Close"].to_numpy() == close).all()
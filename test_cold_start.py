@@ -0,0 +1,14 @@
+import os
+
+from import_profile import TARGETS, profile
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_market_gate_loads_no_heavy_modules(tmp_path):
+    # Run from an empty directory: the closed-market path must not write
+    # the log, journal or metrics files either.
+    code, forbidden = TARGETS["market_gate"]
+    result = profile(f"import sys; sys.path.insert(0, {REPO!r}); {code}", forbidden, repeats=1, cwd=str(tmp_path))
+    assert result["forbidden"] == []
+    assert os.listdir(tmp_path) == []
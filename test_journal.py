@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from indicators import IndicatorStore
+from journal import Journal, recover, replay
+from order_book import OrderBook
+from ring_buffer import RingStore
+from strategies import StrategyEngine
+from stream_feed import bars_at
+
+SETTINGS = {"strategies": ["ma_rsi_combo"], "rsi_buy": 55, "rsi_sell": 45}
+
+
+def order(order_id, symbol, side, qty=1, filled=0):
+    return {"id": order_id, "symbol": symbol, "side": side, "qty": str(qty), "filled_qty": str(filled)}
+
+
+def test_recover_rebuilds_order_book(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    live = OrderBook()
+    live.restore({"positions": {"AAPL": 2.0}, "orders": {}})
+    journal.book(live)
+    journal.orders([("MSFT", "buy")], {"MSFT": order("o1", "MSFT", "buy", 3)})
+    live.on_submitted(order("o1", "MSFT", "buy", 3))
+    for update in ({"event": "partial_fill", "order": order("o1", "MSFT", "buy", 3, 1)},
+                   {"event": "fill", "order": order("o1", "MSFT", "buy", 3, 3), "position_qty": "3"}):
+        live.on_trade_update(update)
+        journal.trade_update(update)
+    journal.close()
+
+    book = OrderBook()
+    assert recover(path, book=book)["trade_update"] == 2
+    assert book.snapshot() == live.snapshot()
+    assert book.position("MSFT") == 3 and not book.has_open_order("MSFT")
+
+
+def test_restored_book_reconciles_before_first_order(tmp_path):
+    # The journal's snapshot is stale: AAPL was sold while the bot was down.
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    live = OrderBook()
+    live.restore({"positions": {"AAPL": 2.0}, "orders": {}})
+    journal.book(live)
+    journal.close()
+
+    class Broker:
+        def list_positions(self):
+            return [SimpleNamespace(symbol="MSFT", qty="1")]
+
+        def list_orders(self, status="open"):
+            return []
+
+    book = OrderBook()
+    recover(path, book=book)
+    assert book.position("AAPL") == 2 and book.needs_reconcile()
+    assert book.reconcile(Broker()) == ["AAPL", "MSFT"]
+    assert book.allow("AAPL", "buy")[0] and not book.allow("MSFT", "buy")[0]
+    assert not book.needs_reconcile()
+
+
+def test_replay_reproduces_stream_signals(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    rng = np.random.default_rng(1)
+    index = pd.date_range("2024-01-02 09:30", periods=300, freq="15min", tz="America/New_York")
+    closes = {s: 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index)))) for s in ("AAPL", "MSFT")}
+    symbols = list(closes)
+
+    journal = Journal(path)
+    rings = RingStore(41)
+    for s, close in closes.items():
+        rings.seed(s, pd.DataFrame({c: close for c in ["Open", "High", "Low", "Close", "Volume"]}, index=index)[:100])
+    engine = StrategyEngine(IndicatorStore(str(tmp_path / "state.json")), log=lambda *a, **k: None)
+    journal.session(SETTINGS, ["ma_rsi_combo"], symbols, 41)
+    journal.seed_bars(rings, symbols)
+    signals = 0
+    for k in range(100, len(index)):
+        for s in symbols:
+            ts = index[k].value
+            rings.append(s, ts, [closes[s][k]] * 5)
+            journal.bar(s, ts, [closes[s][k]] * 5)
+            window = rings.window(s)
+            orders = engine.evaluate(["ma_rsi_combo"], SETTINGS, [s], bars_at(rings, symbols, s, window), trigger=s)
+            journal.signals(orders, trigger=s, ts=ts)
+            signals += bool(orders)
+    journal.close()
+
+    result = replay(path)
+    assert result["bars"] == 2 * 200 and result["signals"] == signals > 0
+    assert result["mismatches"] == []
+
+
+def test_recover_skips_bars_of_other_settings(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.session(SETTINGS, ["ma_rsi_combo"], ["AAPL"], 41)
+    journal.bar("AAPL", 1, [1.0] * 5)
+    journal.close()
+
+    same = {"settings": SETTINGS, "strategies": ["ma_rsi_combo"], "capacity": 41}
+    rings = RingStore(41)
+    assert recover(path, rings=rings, session=same) == {"bar": 1}
+    assert rings.last_ts("AAPL") == 1
+    for changed in ({"settings": dict(SETTINGS, rsi_buy=30)}, {"capacity": 61}):
+        rings = RingStore(41)
+        assert not recover(path, rings=rings, session=dict(same, **changed))
+        assert rings.last_ts("AAPL") is None
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from order_book import CLOSED_IDS, OrderBook
+
+
+class StubApi:
+    def __init__(self, positions=None, orders=None):
+        self.positions = positions or {}
+        self.orders = orders or []
+
+    def list_positions(self):
+        return [SimpleNamespace(symbol=s, qty=str(q)) for s, q in self.positions.items()]
+
+    def list_orders(self, status="open"):
+        return [SimpleNamespace(**o) for o in self.orders]
+
+
+def order(order_id, symbol, side, qty=1, filled=0):
+    return {"id": order_id, "symbol": symbol, "side": side, "qty": str(qty), "filled_qty": str(filled)}
+
+
+def test_seed_blocks_repeat_signals():
+    api = StubApi({"AAPL": 2, "MSFT": -1}, [order("o1", "GOOGL", "buy")])
+    book = OrderBook()
+    book.reconcile(api)
+    assert book.position("AAPL") == 2
+    assert not book.allow("AAPL", "buy")[0]
+    assert book.allow("AAPL", "sell")[0]
+    assert not book.allow("MSFT", "sell")[0]
+    assert not book.allow("GOOGL", "buy")[0]
+    assert book.allow("GOOGL", "sell")[0]
+    assert book.allow("TSLA", "buy")[0]
+
+
+def test_trade_updates_track_fills():
+    book = OrderBook()
+    book.reconcile(StubApi())
+    book.on_submitted(order("o1", "AAPL", "buy", qty=3))
+    assert book.has_open_order("AAPL", "buy")
+    assert not book.allow("AAPL", "buy")[0]
+
+    book.on_trade_update({"event": "partial_fill", "order": order("o1", "AAPL", "buy", 3, 1)})
+    assert book.position("AAPL") == 1
+    assert book.has_open_order("AAPL")
+    book.on_trade_update({"event": "fill", "order": order("o1", "AAPL", "buy", 3, 3), "position_qty": "3"})
+    assert book.position("AAPL") == 3
+    assert not book.has_open_order("AAPL")
+    # Late duplicates of a finished order change nothing.
+    book.on_submitted(order("o1", "AAPL", "buy", 3, 3))
+    book.on_trade_update({"event": "fill", "order": order("o1", "AAPL", "buy", 3, 3)})
+    assert book.position("AAPL") == 3
+    assert not book.has_open_order("AAPL")
+
+    book.on_trade_update({"event": "new", "order": order("o2", "AAPL", "sell", 3)})
+    book.on_trade_update({"event": "canceled", "order": order("o2", "AAPL", "sell", 3)})
+    assert book.position("AAPL") == 3
+    assert book.allow("AAPL", "sell")[0]
+
+    book.on_trade_update({"event": "fill", "order": order("o3", "AAPL", "sell", 3, 3)})
+    assert book.position("AAPL") == 0
+    assert book.allow("AAPL", "buy")[0]
+
+
+def test_reconcile_corrects_drift():
+    logged = []
+    book = OrderBook(reconcile_seconds=0, log=lambda message, level="INFO", symbol=None: logged.append(level))
+    book.reconcile(StubApi({"AAPL": 1}))
+    assert book.reconcile(StubApi({"AAPL": 1})) == []
+    assert book.reconcile(StubApi({"MSFT": 5})) == ["AAPL", "MSFT"]
+    assert book.position("AAPL") == 0 and book.position("MSFT") == 5
+    assert logged == ["WARNING"]
+
+
+def test_closed_ids_are_bounded():
+    book = OrderBook()
+    book.reconcile(StubApi())
+    for n in range(CLOSED_IDS + 10):
+        book.on_trade_update({"event": "canceled", "order": order(f"o{n}", "AAPL", "buy")})
+    assert len(book.closed) == CLOSED_IDS
+    assert f"o{CLOSED_IDS + 9}" in book.closed and "o0" not in book.closed
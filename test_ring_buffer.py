@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from indicators import IndicatorStore, RollingRSI
+from ring_buffer import BarRing, RingStore
+
+
+def bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range("2024-01-02 09:30", periods=n, freq="15min", tz="America/New_York")
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": 1000.0}, index=index)
+
+
+def test_window_is_contiguous_view_after_wrap():
+    ring = BarRing(4)
+    for k in range(10):
+        ring.append(k, [k, k, k, k, k])
+    window = ring.window()
+    assert list(window.ts) == [6, 7, 8, 9]
+    assert list(window["Close"].values) == [6, 7, 8, 9]
+    assert window["Close"].values.base is not None  # a view, not a copy
+    assert list(ring.window(2)["Open"].values) == [8, 9]
+    # A corrected last bar replaces it; an older one is ignored.
+    assert ring.append(9, [1, 1, 1, 1, 1]) and not ring.append(8, [0, 0, 0, 0, 0])
+    assert list(ring.window()["Close"].values) == [6, 7, 8, 1]
+
+
+def test_indicator_sync_matches_pandas():
+    df = bars(300)
+    rings = RingStore(50)
+    rings.seed("AAPL", df.iloc[:200])
+    by_frame, by_ring = IndicatorStore("unused.json"), IndicatorStore("unused.json")
+    by_frame.sync("rsi", RollingRSI, (14,), df["Close"].iloc[:200])
+    by_ring.sync("rsi", RollingRSI, (14,), rings.window("AAPL")["Close"])
+    for end in range(201, 300):
+        rings.append("AAPL", df.index[end - 1].value, df.iloc[end - 1].to_numpy())
+        a = by_frame.sync("rsi", RollingRSI, (14,), df["Close"].iloc[:end])
+        b = by_ring.sync("rsi", RollingRSI, (14,), rings.window("AAPL")["Close"])
+        price = float(df["Close"].iloc[end - 1])
+        assert np.isclose(a.value, b.value) and np.isclose(a.peek(price), b.peek(price))
+    assert by_frame.entries["rsi"]["last_ns"] == by_ring.entries["rsi"]["last_ns"]
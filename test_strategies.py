@@ -0,0 +1,18 @@
+from strategies import merge_orders
+
+
+def test_conflicting_leg_drops_whole_pair():
+    pair = ("pairs_zscore", "KO-PEP")
+    orders = [
+        ("KO", "sell", pair), ("PEP", "buy", pair),
+        ("KO", "buy", ("ma_rsi_combo", "KO")),
+        ("MSFT", "buy", ("ma_rsi_combo", "MSFT")),
+        ("MSFT", "buy", ("bollinger_rsi", "MSFT")),
+    ]
+    assert merge_orders(orders, log=lambda *a, **k: None) == [("MSFT", "buy")]
+
+
+def test_pair_leg_agreeing_with_another_strategy_is_sent_once():
+    pair = ("pairs_zscore", "KO-PEP")
+    orders = [("KO", "sell", pair), ("PEP", "buy", pair), ("PEP", "buy", ("ma_rsi_combo", "PEP"))]
+    assert merge_orders(orders, log=lambda *a, **k: None) == [("KO", "sell"), ("PEP", "buy")]